@@ -1,13 +1,78 @@
+from django.core.cache import cache
 from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.contrib.postgres.aggregates import JSONBAgg
+from django.db.models import Exists, OuterRef, Prefetch, Q, Value
+from django.db.models.functions import JSONObject
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import PermissionDenied
 from pos.apps.accounts.models import User
+from pos.apps.accounts.utils import (
+    FRANCHISE_ADMIN_LIST_CACHE_TIMEOUT,
+    franchise_admin_list_cache_key,
+    get_user_location_ids,
+    invalidate_franchise_admin_lists,
+)
 from pos.apps.locations.models import LocationModel
 from pos.utils.logger import POSLogger
+from pos.utils.permissions import CoversObjectLocations, IsSuperOrFranchiseAdmin
+from pos.utils.renderers import ORJSONRenderer
 
 logger = POSLogger(__name__)
 
+_REQUIRED_POST_FIELDS = frozenset({'email', 'password', 'first_name', 'last_name', 'location_ids'})
+
+# Rows fetched per round-trip when building list responses
+ADMIN_LIST_CHUNK_SIZE = 500
+
+
+def _parse_location_ids(raw):
+    """Validate location_ids from a request body and return them as a frozenset of ints"""
+    if not isinstance(raw, list):
+        raise ValueError('location_ids must be a list')
+    location_ids = set()
+    for loc_id in raw:
+        # bool is an int subclass, reject it explicitly
+        if type(loc_id) is not int:
+            raise ValueError('location_ids must contain integer IDs')
+        location_ids.add(loc_id)
+    return frozenset(location_ids)
+
+
+def _admin_rows(queryset):
+    """
+    Project franchise admins to response dicts, with their locations
+    aggregated into a JSON array by Postgres in the same query.
+    """
+    rows = queryset.annotate(
+        location_list=JSONBAgg(
+            JSONObject(id='locations__id', name='locations__name'),
+            filter=Q(locations__isnull=False),
+            default=Value('[]'),
+        )
+    ).values('id', 'email', 'first_name', 'last_name', 'location_list')
+
+    # Stream rows from the cursor in chunks instead of filling the queryset cache
+    admins_data = []
+    for row in rows.iterator(chunk_size=ADMIN_LIST_CHUNK_SIZE):
+        row['locations'] = row.pop('location_list')
+        admins_data.append(row)
+    return admins_data
+
+
+def _serialize_admin(admin):
+    """Response dict for a single franchise admin, expects locations to be prefetched"""
+    return {
+        'id': admin.id,
+        'email': admin.email,
+        'first_name': admin.first_name,
+        'last_name': admin.last_name,
+        'locations': [{'id': loc.id, 'name': loc.name} for loc in admin.locations.all()],
+    }
+
+
 class FranchiseAdminView(APIView):
     """
     Handles franchise admin operations:
@@ -16,153 +81,144 @@ class FranchiseAdminView(APIView):
     - PATCH: Update franchise admin
     - DELETE: Deactivate franchise admin
     
-    Protected: Only super admins can access this view
+    Protected: Only super admins and franchise admins can access this view
     """
+    permission_classes = [IsSuperOrFranchiseAdmin, CoversObjectLocations]
+    renderer_classes = [ORJSONRenderer]
     
     def post(self, request):
         """Create new franchise admin"""
-        logger.info(f"hello mawa from the postmethod \n\n\n\n\n\n\n")
-        required_fields = ['email', 'password', 'first_name', 'last_name', 'location_ids']
-        if missing := [f for f in required_fields if f not in request.data]:
-            logger.warning(f"Attempt to create franchise admin with missing fields: {missing}")
+        logger.info("Franchise admin create request received")
+        if not isinstance(request.data, dict):
+            return Response({'error': 'Request body must be a JSON object'}, status=status.HTTP_400_BAD_REQUEST)
+        if missing := _REQUIRED_POST_FIELDS - request.data.keys():
+            logger.warning("Attempt to create franchise admin with missing fields: %s", missing)
             return Response(
-                {'error': f'Missing fields: {", ".join(missing)}'},
+                {'error': f'Missing fields: {", ".join(sorted(missing))}'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        if request.user.is_super_admin:
-            try:
-                franchise_admin = User.objects.create_user(
-                    email=request.data['email'],
-                    password=request.data['password'],
-                    first_name=request.data['first_name'],
-                    last_name=request.data['last_name'],
-                    is_franchise_admin=True
-                )
-
-                if 'location_ids' in request.data:
-                    locations = LocationModel.objects.filter(id__in=request.data['location_ids'])
-                    franchise_admin.locations.set(locations)
-
-                logger.info(f"Franchise admin {franchise_admin.email} created by {request.user.email}")
-                return Response({
-                    'id': franchise_admin.id,
-                    'email': franchise_admin.email,
-                    'message': 'Franchise admin created successfully'
-                }, status=status.HTTP_201_CREATED)
+        try:
+            requested_locations = _parse_location_ids(request.data['location_ids'])
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-            except Exception as e:
-                logger.error(f"Error creating franchise admin: {str(e)}")
-                return Response(
-                    {'error': str(e)},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        elif request.user.is_franchise_admin:
-            admin = get_object_or_404(User,id=request.user.id, is_franchise_admin = True)
-            locations = list(admin.locations.values('id'))
-            requested_locations = request.data['location_ids']
-            admin_locations = [loc['id'] for loc in locations]
+        if request.user.is_franchise_admin:
             # Check if all requested locations are in admin's accessible locations
-            if not all(loc_id in admin_locations for loc_id in requested_locations):
-                logger.warning(f"Franchise admin {request.user.email} attempted to create admin with unauthorized locations")
+            if not requested_locations.issubset(get_user_location_ids(request.user)):
+                logger.warning("Franchise admin %s attempted to create admin with unauthorized locations", request.user.email)
                 return Response(
                     {'error': 'You do not have access to all requested locations'},
                     status=status.HTTP_403_FORBIDDEN
                 )
-            
-            try:
-                franchise_admin = User.objects.create_user(
-                    email=request.data['email'],
-                    password=request.data['password'],
-                    first_name=request.data['first_name'],
-                    last_name=request.data['last_name'],
-                    is_franchise_admin=True
-                )
 
-                locations = LocationModel.objects.filter(id__in=requested_locations)
-                franchise_admin.locations.set(locations)
+        valid_ids = frozenset(LocationModel.objects.filter(id__in=requested_locations).values_list('id', flat=True))
+        if len(valid_ids) != len(requested_locations):
+            logger.warning("Attempt to create franchise admin with invalid locations: %s", requested_locations - valid_ids)
+            return Response(
+                {'error': 'One or more location IDs are invalid'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-                logger.info(f"Franchise admin {franchise_admin.email} created by {request.user.email}")
-                return Response({
-                    'id': franchise_admin.id,
-                    'email': franchise_admin.email,
-                    'message': 'Franchise admin created successfully'
-                }, status=status.HTTP_201_CREATED)
+        # Reject duplicates before create_user spends time hashing the password
+        email = User.objects.normalize_email(request.data['email'])
+        if User.objects.filter(email=email).exists():
+            logger.warning("Attempt to create franchise admin with existing email %s", email)
+            return Response(
+                {'error': 'A user with this email already exists'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-            except Exception as e:
-                logger.error(f"Error creating franchise admin: {str(e)}")
-                return Response(
-                    {'error': str(e)},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        else:
-            return(Response({'error':'not allowed'}))
+        try:
+            franchise_admin = self._create_franchise_admin(request.data, valid_ids)
+        except Exception as e:
+            logger.error("Error creating franchise admin: %s", e)
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        logger.info("Franchise admin %s created by %s", franchise_admin.email, request.user.email)
+        return Response({
+            'id': franchise_admin.id,
+            'email': franchise_admin.email,
+            'message': 'Franchise admin created successfully'
+        }, status=status.HTTP_201_CREATED)
+
+    def _create_franchise_admin(self, data, location_ids):
+        """Create a franchise admin and assign its locations in a single transaction"""
+        with transaction.atomic():
+            franchise_admin = User.objects.create_user(
+                email=data['email'],
+                password=data['password'],
+                first_name=data['first_name'],
+                last_name=data['last_name'],
+                is_franchise_admin=True
+            )
+            # Fresh user has no locations yet, so a plain bulk add is enough
+            franchise_admin.locations.add(*location_ids)
+
+        invalidate_franchise_admin_lists()
+        return franchise_admin
 
     def get(self, request):
         """Get all franchise admins or specific one"""
-        logger.info(f"[FranchiseAdminView] GET request received by meeeeeeeeeeeeeeeeeeeeeeeeeeeeee")
+        logger.info("Franchise admin list/detail request received")
         
         admin_id = request.query_params.get('id')
         if admin_id:
             try:
-                admin = get_object_or_404(User, id=admin_id, is_franchise_admin=True)
-                locations = list(admin.locations.values('id', 'name'))
-                
-                logger.info(f"Franchise admin {admin.email} details accessed by {request.user.email}")
-                return Response({
-                    'id': admin.id,
-                    'email': admin.email,
-                    'first_name': admin.first_name,
-                    'last_name': admin.last_name,
-                    'locations': locations
-                })
+                admin = get_object_or_404(
+                    User.franchise_admins.prefetch_related(
+                        Prefetch('locations', queryset=LocationModel.objects.only('id', 'name'))
+                    ),
+                    pk=admin_id
+                )
+                logger.info("Franchise admin %s details accessed by %s", admin.email, request.user.email)
+                return Response(_serialize_admin(admin))
             except Exception as e:
-                logger.warning(f"Error retrieving franchise admin {admin_id}: {str(e)}")
+                logger.warning("Error retrieving franchise admin %s: %s", admin_id, e)
                 return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
         else:
             if request.user.is_super_admin:
-                # Get all franchise admins
-                franchise_admins = User.objects.filter(is_franchise_admin=True)
-                
-                # Prepare response with locations as arrays
-                admins_data = []
-                for admin in franchise_admins:
-                    admin_locations = list(admin.locations.values('id', 'name'))
-                    admins_data.append({
-                        'id': admin.id,
-                        'email': admin.email,
-                        'first_name': admin.first_name,
-                        'last_name': admin.last_name,
-                        'locations': admin_locations
-                    })
+                cache_key = franchise_admin_list_cache_key('super')
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    logger.info("All franchise admins list accessed by %s", request.user.email)
+                    return Response(cached)
+
+                # Get all franchise admins with their locations as arrays
+                admins_data = _admin_rows(User.objects.filter(is_franchise_admin=True))
                 
-                logger.info(f"All franchise admins list accessed by {request.user.email}")
+                cache.set(cache_key, admins_data, FRANCHISE_ADMIN_LIST_CACHE_TIMEOUT)
+                logger.info("All franchise admins list accessed by %s", request.user.email)
                 return Response(admins_data)
-            elif request.user.is_franchise_admin:
-                admin = get_object_or_404(User, id=request.user.id, is_franchise_admin=True)
-                
+            else:
+                admin_location_ids = list(get_user_location_ids(request.user))
+                if not admin_location_ids:
+                    # No locations assigned, nobody can share one with this admin
+                    return Response([])
+
+                cache_key = franchise_admin_list_cache_key('franchise', admin_location_ids)
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    logger.info("Franchise admins list accessed by franchise admin %s", request.user.email)
+                    return Response(cached)
+
                 # Get all franchise admins that have access to any of these locations
-                franchise_admins = User.objects.filter(
-                    is_franchise_admin=True,
-                    locations__in=admin.locations.all()
-                ).distinct()
-                
-                # Prepare response with locations as arrays
-                admins_data = []
-                for admin in franchise_admins:
-                    admin_locations = list(admin.locations.values('id', 'name'))
-                    admins_data.append({
-                        'id': admin.id,
-                        'email': admin.email,
-                        'first_name': admin.first_name,
-                        'last_name': admin.last_name,
-                        'locations': admin_locations
-                    })
+                # EXISTS stops at the first shared location per admin, so no DISTINCT is needed
+                shares_location = User.locations.through.objects.filter(
+                    user_id=OuterRef('pk'),
+                    locationmodel_id__in=admin_location_ids
+                )
+                admins_data = _admin_rows(User.objects.filter(
+                    Exists(shares_location),
+                    is_franchise_admin=True
+                ))
                 
-                logger.info(f"Franchise admins list accessed by franchise admin {request.user.email}")
+                cache.set(cache_key, admins_data, FRANCHISE_ADMIN_LIST_CACHE_TIMEOUT)
+                logger.info("Franchise admins list accessed by franchise admin %s", request.user.email)
                 return Response(admins_data)
-            else: 
-                return Response({'error' : 'not allowed'})
 
 
     def patch(self, request):
@@ -174,42 +230,48 @@ class FranchiseAdminView(APIView):
             return Response({'error': 'Franchise admin ID required'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            admin = get_object_or_404(User, id=request.data['id'], is_franchise_admin=True)
-
-            if request.user.is_super_admin:
-                # Super admin can update freely
-                pass
-            elif request.user.is_franchise_admin:
-                # Franchise admin can only update if target admin is within their locations
-                requestor_locations = set(request.user.locations.values_list('id', flat=True))
-                target_locations = set(admin.locations.values_list('id', flat=True))
-                if not target_locations.issubset(requestor_locations):
-                    logger.warning(f"{request.user.email} unauthorized to update this admin")
-                    return Response({'error': 'Unauthorized to update this franchise admin'}, status=status.HTTP_403_FORBIDDEN)
-            else:
-                return Response({'error': 'Not allowed'}, status=status.HTTP_403_FORBIDDEN)
+            admin = get_object_or_404(User.franchise_admins, pk=request.data['id'])
+            # Franchise admin can only update if target admin is within their locations
+            self.check_object_permissions(request, admin)
 
             # Perform updates
-            for field in ['first_name', 'last_name', 'email']:
-                if field in request.data:
-                    setattr(admin, field, request.data[field])
+            changed = [f for f in ('first_name', 'last_name', 'email') if f in request.data]
+            for field in changed:
+                setattr(admin, field, request.data[field])
 
             if 'location_ids' in request.data:
-                location_ids = request.data['location_ids']
-                new_locations = LocationModel.objects.filter(id__in=location_ids)
+                try:
+                    location_ids = _parse_location_ids(request.data['location_ids'])
+                except ValueError as e:
+                    return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
                 if request.user.is_franchise_admin:
-                    if not set(location_ids).issubset(request.user.locations.values_list('id', flat=True)):
+                    if not location_ids.issubset(get_user_location_ids(request.user)):
                         return Response({'error': 'Cannot assign unauthorized locations'}, status=status.HTTP_403_FORBIDDEN)
 
-                admin.locations.set(new_locations)
+                if LocationModel.objects.filter(id__in=location_ids).count() != len(location_ids):
+                    return Response({'error': 'One or more location IDs are invalid'}, status=status.HTTP_400_BAD_REQUEST)
+
+                # Diff against the current ids so an unchanged list issues no writes
+                current_ids = frozenset(admin.locations.values_list('id', flat=True))
+                to_add = location_ids - current_ids
+                to_remove = current_ids - location_ids
+                if to_add:
+                    admin.locations.add(*to_add)
+                if to_remove:
+                    admin.locations.remove(*to_remove)
 
-            admin.save()
-            logger.info(f"Franchise admin {admin.email} updated by {request.user.email}")
+            # Location changes are persisted by the M2M manager, only save the row if a column changed
+            if changed:
+                admin.save(update_fields=changed)
+            invalidate_franchise_admin_lists()
+            logger.info("Franchise admin %s updated by %s", admin.email, request.user.email)
             return Response({'message': 'Franchise admin updated'})
 
+        except PermissionDenied:
+            raise
         except Exception as e:
-            logger.error(f"Error updating franchise admin: {str(e)}")
+            logger.error("Error updating franchise admin: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
 
 
@@ -222,25 +284,18 @@ class FranchiseAdminView(APIView):
             return Response({'error': 'Specify ?id=<franchise_admin_id>'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            admin = get_object_or_404(User, id=request.query_params['id'], is_franchise_admin=True)
-
-            if request.user.is_super_admin:
-                pass  # Full access
-            elif request.user.is_franchise_admin:
-                requestor_locations = set(request.user.locations.values_list('id', flat=True))
-                target_locations = set(admin.locations.values_list('id', flat=True))
-                if not target_locations.issubset(requestor_locations):
-                    logger.warning(f"{request.user.email} unauthorized to delete this admin")
-                    return Response({'error': 'Unauthorized to delete this franchise admin'}, status=status.HTTP_403_FORBIDDEN)
-            else:
-                return Response({'error': 'Not allowed'}, status=status.HTTP_403_FORBIDDEN)
+            admin = get_object_or_404(User.franchise_admins, pk=request.query_params['id'])
+            self.check_object_permissions(request, admin)
 
             admin_email = admin.email
             admin.delete()
-            logger.warning(f"Franchise admin {admin_email} deleted by {request.user.email}")
+            invalidate_franchise_admin_lists()
+            logger.warning("Franchise admin %s deleted by %s", admin_email, request.user.email)
             return Response({'message': 'Franchise admin permanently deleted'}, status=status.HTTP_204_NO_CONTENT)
 
+        except PermissionDenied:
+            raise
         except Exception as e:
-            logger.error(f"Error deleting franchise admin: {str(e)}")
+            logger.error("Error deleting franchise admin: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
 
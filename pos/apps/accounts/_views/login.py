@@ -1,5 +1,4 @@
 from django.http import JsonResponse
-from django.contrib.auth import authenticate
 from django.contrib.auth import get_user_model
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
@@ -44,6 +43,28 @@ class UserLoginView(APIView):
     """Handles both staff and admin logins"""
     permission_classes = [AllowAny]
     
+    def authenticate_user(self, email, password):
+        """
+        Look the user up by email and verify the password, returns None on failure.
+        Only ModelBackend is configured, so this skips the authenticate() backend loop
+        and loads just the columns the login response needs.
+        """
+        # JSON bodies can carry any type, only strings can be valid credentials
+        if not isinstance(email, str) or not isinstance(password, str):
+            return None
+        try:
+            user = User.objects.only(
+                'id', 'email', 'password', 'first_name', 'last_name',
+                'is_super_admin', 'is_franchise_admin', 'is_staff_member'
+            ).get(email=email)
+        except User.DoesNotExist:
+            # Run the hasher once anyway so unknown emails take as long as wrong passwords
+            User().set_password(password)
+            return None
+        if not user.check_password(password) or not user.is_active:
+            return None
+        return user
+
     def get_tokens_for_user(self, user):
         refresh = RefreshToken.for_user(user)
         return {
@@ -62,15 +83,16 @@ class UserLoginView(APIView):
             )
         
         # Authenticate user
-        user = authenticate(username=email, password=password)
-        if not user or not user.is_active:
+        user = self.authenticate_user(email, password)
+        if not user:
             return Response(
                 {'error': 'Invalid credentials'},
                 status=status.HTTP_401_UNAUTHORIZED
             )
         
         tokens = self.get_tokens_for_user(user)
-        user_locations = user.locations.filter(is_active=True)
+        # Only id and name go into the response, skip hydrating full Location rows
+        user_locations = user.locations.filter(is_active=True).values('id', 'name')
         response_data = {
             **tokens,
             'user': {
@@ -82,12 +104,7 @@ class UserLoginView(APIView):
                 'is_franchise_admin': user.is_franchise_admin,
                 'is_staff_member': user.is_staff_member,
             },
-            'locations' : [
-                {
-                    'id': location.id,
-                    'name': location.name
-                } for location in user_locations
-            ]
+            'locations' : list(user_locations)
         }
         
         
@@ -27,7 +27,7 @@ class LogoutView(APIView):
             user.is_logged_in = False
             user.save()
             
-            logger.info(f"User {request.user.email} logged out successfully")
+            logger.info("User %s logged out successfully", request.user.email)
             
             # Return response and clear cookies
             response = JsonResponse({"message": "Logout successful"}, status=status.HTTP_200_OK)
@@ -36,5 +36,5 @@ class LogoutView(APIView):
             return response
             
         except Exception as e:
-            logger.error(f"Logout error: {str(e)}")
+            logger.error("Logout error: %s", e)
             return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
@@ -1,13 +1,104 @@
+from collections import defaultdict
+
+from django.db import DatabaseError, transaction
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django.db.models import Exists, OuterRef, Prefetch
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from pos.apps.accounts.models import User
+from pos.apps.accounts.utils import get_user_location_ids
 from pos.apps.locations.models import LocationModel
 from pos.utils.logger import POSLogger
+from pos.utils.permissions import IsSuperOrFranchiseAdmin
+from pos.utils.renderers import ORJSONRenderer
 
 logger = POSLogger(__name__)
 
+_REQUIRED_POST_FIELDS = frozenset({'email', 'password', 'first_name', 'last_name', 'location_ids'})
+
+# Rows fetched per round-trip when building list responses
+STAFF_LIST_CHUNK_SIZE = 500
+
+
+def _parse_location_ids(raw):
+    """
+    Coerce location_ids from a request body to a set of ints, so they compare equal to
+    primary keys. Numeric strings are accepted, as the id__in lookup always did.
+    """
+    if not isinstance(raw, list):
+        raise ValueError('location_ids must be a list')
+    return {int(loc_id) for loc_id in raw}
+
+
+def _staff_with_locations(queryset):
+    """Prefetch staff locations in one extra query instead of one per staff member"""
+    return queryset.prefetch_related(
+        Prefetch('locations', queryset=LocationModel.objects.only('id', 'name'))
+    )
+
+
+def _works_at_any(location_ids):
+    """
+    EXISTS condition matching users linked to any of the given locations.
+    Stops at the first matching link per user, so no JOIN + DISTINCT is needed.
+    """
+    return Exists(User.locations.through.objects.filter(
+        user_id=OuterRef('pk'),
+        locationmodel_id__in=location_ids
+    ))
+
+
+def _attach_locations(rows):
+    """Fill in each row's locations from a single query on the M2M table"""
+    locations_by_user = defaultdict(list)
+    links = User.locations.through.objects.filter(
+        user_id__in=[row['id'] for row in rows]
+    ).values_list('user_id', 'locationmodel_id', 'locationmodel__name')
+    for user_id, loc_id, loc_name in links:
+        locations_by_user[user_id].append({'id': loc_id, 'name': loc_name})
+
+    for row in rows:
+        row['locations'] = locations_by_user[row['id']]
+
+
+def _staff_rows(queryset):
+    """
+    Project staff members to response dicts without building model instances.
+    Rows stream from the cursor in chunks, each chunk gets its locations in one query.
+    """
+    staff_members = []
+    chunk = []
+    rows = queryset.values('id', 'email', 'first_name', 'last_name')
+    for row in rows.iterator(chunk_size=STAFF_LIST_CHUNK_SIZE):
+        chunk.append(row)
+        if len(chunk) == STAFF_LIST_CHUNK_SIZE:
+            _attach_locations(chunk)
+            staff_members.extend(chunk)
+            chunk = []
+    if chunk:
+        _attach_locations(chunk)
+        staff_members.extend(chunk)
+    return staff_members
+
+
+def _shares_location(user, staff):
+    """Check in one EXISTS query whether the staff member works at any of the user's locations"""
+    return staff.locations.filter(id__in=get_user_location_ids(user)).exists()
+
+
+def _serialize_staff(staff):
+    """Response dict for a staff member, expects locations to be prefetched"""
+    return {
+        'id': staff.id,
+        'email': staff.email,
+        'first_name': staff.first_name,
+        'last_name': staff.last_name,
+        'locations': [{'id': loc.id, 'name': loc.name} for loc in staff.locations.all()],
+    }
+
+
 class StaffView(APIView):
     """
     Handles staff member operations:
@@ -18,21 +109,30 @@ class StaffView(APIView):
     
     Protected: Only super admins and franchise admins can access this view
     """
+    permission_classes = [IsSuperOrFranchiseAdmin]
+    renderer_classes = [ORJSONRenderer]
     
     def post(self, request):
         """Create new staff member"""
-        required_fields = ['email', 'password', 'first_name', 'last_name', 'location_ids']
-        if missing := [f for f in required_fields if f not in request.data]:
-            logger.warning(f"Attempt to create staff member with missing fields: {missing}")
+        if not isinstance(request.data, dict):
+            return Response({'error': 'Request body must be a JSON object'}, status=status.HTTP_400_BAD_REQUEST)
+        if missing := _REQUIRED_POST_FIELDS - request.data.keys():
+            logger.warning("Attempt to create staff member with missing fields: %s", missing)
             return Response(
-                {'error': f'Missing fields: {", ".join(missing)}'},
+                {'error': f'Missing fields: {", ".join(sorted(missing))}'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
         # Validate location IDs
-        location_ids = request.data['location_ids']
+        try:
+            location_ids = _parse_location_ids(request.data['location_ids'])
+        except (ValueError, TypeError):
+            return Response(
+                {'error': 'location_ids must be a list of location IDs'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         if not location_ids:
-            logger.warning(f"Attempt to create staff member without assigning locations")
+            logger.warning("Attempt to create staff member without assigning locations")
             return Response(
                 {'error': 'At least one location must be assigned to a staff member'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -41,10 +141,12 @@ class StaffView(APIView):
         # Super admin can create staff for any location
         if request.user.is_super_admin:
             try:
-                locations = LocationModel.objects.filter(id__in=location_ids)
-                if len(locations) != len(location_ids):
+                # One query both validates the ids and gives the names for the response
+                locations = list(LocationModel.objects.filter(id__in=location_ids).values('id', 'name'))
+                if missing_ids := location_ids - {loc['id'] for loc in locations}:
+                    logger.warning("Attempt to create staff member with invalid locations: %s", missing_ids)
                     return Response(
-                        {'error': 'One or more location IDs are invalid'},
+                        {'error': 'One or more location IDs are invalid', 'invalid_location_ids': sorted(missing_ids)},
                         status=status.HTTP_400_BAD_REQUEST
                     )
                 
@@ -53,69 +155,60 @@ class StaffView(APIView):
                     password=request.data['password'],
                     first_name=request.data['first_name'],
                     last_name=request.data['last_name'],
-                    locations=locations
+                    locations=[loc['id'] for loc in locations]
                 )
 
-                logger.info(f"Staff member {staff_member.email} created by super admin {request.user.email}")
+                logger.info("Staff member %s created by super admin %s", staff_member.email, request.user.email)
                 return Response({
                     'id': staff_member.id,
                     'email': staff_member.email,
                     'message': 'Staff member created successfully',
-                    'locations': list(locations.values('id', 'name'))
+                    'locations': locations
                 }, status=status.HTTP_201_CREATED)
 
-            except Exception as e:
-                logger.error(f"Error creating staff member: {str(e)}")
+            # DatabaseError also covers IntegrityError and DataError (e.g. a name over max_length)
+            except (DatabaseError, ValueError, TypeError) as e:
+                logger.error("Error creating staff member: %s", e)
                 return Response(
                     {'error': str(e)},
                     status=status.HTTP_400_BAD_REQUEST
                 )
         
         # Franchise admin can create staff only for locations they have access to
-        elif request.user.is_franchise_admin:
-            admin = get_object_or_404(User, id=request.user.id, is_franchise_admin=True)
-            admin_locations = list(admin.locations.values('id'))
-            admin_location_ids = [loc['id'] for loc in admin_locations]
-            
+        else:
             # Check if all requested locations are in admin's accessible locations
-            if not all(loc_id in admin_location_ids for loc_id in location_ids):
-                logger.warning(f"Franchise admin {request.user.email} attempted to create staff with unauthorized locations")
+            if not location_ids.issubset(get_user_location_ids(request.user)):
+                logger.warning("Franchise admin %s attempted to create staff with unauthorized locations", request.user.email)
                 return Response(
                     {'error': 'You do not have access to all requested locations'},
                     status=status.HTTP_403_FORBIDDEN
                 )
             
             try:
-                locations = LocationModel.objects.filter(id__in=location_ids)
+                locations = list(LocationModel.objects.filter(id__in=location_ids).values('id', 'name'))
                 
                 staff_member = User.objects.create_staff_user(
                     email=request.data['email'],
                     password=request.data['password'],
                     first_name=request.data['first_name'],
                     last_name=request.data['last_name'],
-                    locations=locations
+                    locations=[loc['id'] for loc in locations]
                 )
 
-                logger.info(f"Staff member {staff_member.email} created by franchise admin {request.user.email}")
+                logger.info("Staff member %s created by franchise admin %s", staff_member.email, request.user.email)
                 return Response({
                     'id': staff_member.id,
                     'email': staff_member.email,
                     'message': 'Staff member created successfully',
-                    'locations': list(locations.values('id', 'name'))
+                    'locations': locations
                 }, status=status.HTTP_201_CREATED)
 
-            except Exception as e:
-                logger.error(f"Error creating staff member: {str(e)}")
+            except (DatabaseError, ValueError, TypeError) as e:
+                logger.error("Error creating staff member: %s", e)
                 return Response(
                     {'error': str(e)},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-        else:
-            logger.warning(f"Unauthorized user {request.user.email} attempted to create staff member")
-            return Response(
-                {'error': 'Not authorized to create staff members'},
-                status=status.HTTP_403_FORBIDDEN
-            )
 
     def get(self, request):
         """Get all staff members or specific one"""
@@ -124,8 +217,16 @@ class StaffView(APIView):
         
         # Validate user has access to the location if location filter is applied
         if location_id:
+            try:
+                location_id = int(location_id)
+            except ValueError:
+                return Response(
+                    {'error': 'Invalid location ID'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            # Set lookup against the cached location ids, no query
             if not request.user.has_location_access(location_id):
-                logger.warning(f"User {request.user.email} attempted to access staff for unauthorized location")
+                logger.warning("User %s attempted to access staff for unauthorized location", request.user.email)
                 return Response(
                     {'error': 'You do not have access to this location'},
                     status=status.HTTP_403_FORBIDDEN
@@ -134,33 +235,23 @@ class StaffView(APIView):
         # Get specific staff member by ID
         if staff_id:
             try:
-                staff = get_object_or_404(User, id=staff_id, is_staff_member=True)
+                staff = get_object_or_404(_staff_with_locations(User.staff_members.all()), id=staff_id)
                 
                 # Check if user has access to view this staff member
                 if request.user.is_franchise_admin:
-                    admin_locations = request.user.locations.all()
-                    staff_locations = staff.locations.all()
-                    
-                    # Check if there's an overlap in locations
-                    if not any(loc in admin_locations for loc in staff_locations):
-                        logger.warning(f"Franchise admin {request.user.email} attempted to access unauthorized staff {staff.email}")
+                    # Locations are prefetched, so the overlap check runs against the cached id set
+                    staff_location_ids = (loc.id for loc in staff.locations.all())
+                    if get_user_location_ids(request.user).isdisjoint(staff_location_ids):
+                        logger.warning("Franchise admin %s attempted to access unauthorized staff %s", request.user.email, staff.email)
                         return Response(
                             {'error': 'You do not have access to this staff member'},
                             status=status.HTTP_403_FORBIDDEN
                         )
                 
-                locations = list(staff.locations.values('id', 'name'))
-                
-                logger.info(f"Staff member {staff.email} details accessed by {request.user.email}")
-                return Response({
-                    'id': staff.id,
-                    'email': staff.email,
-                    'first_name': staff.first_name,
-                    'last_name': staff.last_name,
-                    'locations': locations
-                })
-            except Exception as e:
-                logger.warning(f"Error retrieving staff member {staff_id}: {str(e)}")
+                logger.info("Staff member %s details accessed by %s", staff.email, request.user.email)
+                return Response(_serialize_staff(staff))
+            except (Http404, ValueError) as e:
+                logger.warning("Error retrieving staff member %s: %s", staff_id, e)
                 return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
         
         # List all accessible staff members
@@ -170,58 +261,24 @@ class StaffView(APIView):
                 staff_query = User.objects.filter(is_staff_member=True)
                 
                 if location_id:
-                    staff_query = staff_query.filter(locations__id=location_id).distinct()
+                    staff_query = staff_query.filter(_works_at_any([location_id]))
                 
-                staff_members = []
-                for staff in staff_query:
-                    locations = list(staff.locations.values('id', 'name'))
-                    staff_data = {
-                        'id': staff.id,
-                        'email': staff.email,
-                        'first_name': staff.first_name,
-                        'last_name': staff.last_name,
-                        'locations': locations
-                    }
-                    staff_members.append(staff_data)
+                staff_members = _staff_rows(staff_query)
                 
-                logger.info(f"All staff members list accessed by super admin {request.user.email}")
+                logger.info("All staff members list accessed by super admin %s", request.user.email)
                 return Response(staff_members)
             
-            elif request.user.is_franchise_admin:
+            else:
                 # Franchise admin can only see staff members in their locations
-                admin = get_object_or_404(User, id=request.user.id, is_franchise_admin=True)
-                
-                # Get all staff members that have access to any of the admin's locations
-                staff_query = User.objects.filter(
-                    is_staff_member=True,
-                    locations__in=admin.locations.all()
-                ).distinct()
+                # Get all staff members that have access to any of the admin's locations,
+                # or just the requested one, access to it was checked above
+                location_ids = [location_id] if location_id else get_user_location_ids(request.user)
+                staff_query = User.objects.filter(_works_at_any(location_ids), is_staff_member=True)
                 
-                # Further filter by location_id if provided
-                if location_id:
-                    staff_query = staff_query.filter(locations__id=location_id).distinct()
+                staff_members = _staff_rows(staff_query)
                 
-                staff_members = []
-                for staff in staff_query:
-                    locations = list(staff.locations.values('id', 'name'))
-                    staff_data = {
-                        'id': staff.id,
-                        'email': staff.email,
-                        'first_name': staff.first_name,
-                        'last_name': staff.last_name,
-                        'locations': locations
-                    }
-                    staff_members.append(staff_data)
-                
-                logger.info(f"Staff members list accessed by franchise admin {request.user.email}")
+                logger.info("Staff members list accessed by franchise admin %s", request.user.email)
                 return Response(staff_members)
-            
-            else:
-                logger.warning(f"Unauthorized user {request.user.email} attempted to list staff members")
-                return Response(
-                    {'error': 'Not authorized to view staff members'},
-                    status=status.HTTP_403_FORBIDDEN
-                )
 
     def patch(self, request):
         """Update staff member details"""
@@ -232,68 +289,89 @@ class StaffView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        location_ids = None
+        if 'location_ids' in request.data:
+            try:
+                location_ids = _parse_location_ids(request.data['location_ids'])
+            except (ValueError, TypeError):
+                return Response(
+                    {'error': 'location_ids must be a list of location IDs'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
         try:
-            staff = get_object_or_404(User, id=request.data['id'], is_staff_member=True)
+            # Lock the row so concurrent updates don't interleave, and roll back location changes if the save fails
+            with transaction.atomic():
+                # The password column stays deferred, set_password() assigns it and update_fields writes it
+                staff = get_object_or_404(User.staff_members.select_for_update(), id=request.data['id'])
             
-            # Check if franchise admin has access to this staff member
-            if request.user.is_franchise_admin:
-                admin_locations = request.user.locations.all()
-                staff_locations = staff.locations.all()
-                
-                # Check if there's an overlap in locations
-                if not any(loc in admin_locations for loc in staff_locations):
-                    logger.warning(f"Franchise admin {request.user.email} attempted to update unauthorized staff {staff.email}")
-                    return Response(
-                        {'error': 'You do not have access to this staff member'},
-                        status=status.HTTP_403_FORBIDDEN
-                    )
-                
-                # If updating locations, ensure franchise admin has access to all new locations
-                if 'location_ids' in request.data:
-                    admin_location_ids = [loc.id for loc in admin_locations]
-                    if not all(loc_id in admin_location_ids for loc_id in request.data['location_ids']):
-                        logger.warning(f"Franchise admin {request.user.email} attempted to assign staff to unauthorized locations")
+                # Check if franchise admin has access to this staff member
+                if request.user.is_franchise_admin:
+                    if not _shares_location(request.user, staff):
+                        logger.warning("Franchise admin %s attempted to update unauthorized staff %s", request.user.email, staff.email)
                         return Response(
-                            {'error': 'You do not have access to all requested locations'},
+                            {'error': 'You do not have access to this staff member'},
                             status=status.HTTP_403_FORBIDDEN
                         )
+                
+                    # If updating locations, ensure franchise admin has access to all new locations
+                    if location_ids is not None:
+                        if not location_ids.issubset(get_user_location_ids(request.user)):
+                            logger.warning("Franchise admin %s attempted to assign staff to unauthorized locations", request.user.email)
+                            return Response(
+                                {'error': 'You do not have access to all requested locations'},
+                                status=status.HTTP_403_FORBIDDEN
+                            )
                     
+                        # Ensure at least one location is assigned
+                        if not location_ids:
+                            logger.warning("Attempt to update staff member without assigning locations")
+                            return Response(
+                                {'error': 'At least one location must be assigned to a staff member'},
+                                status=status.HTTP_400_BAD_REQUEST
+                            )
+            
+                # Update fields
+                changed = [f for f in ('first_name', 'last_name', 'email') if f in request.data]
+                for field in changed:
+                    setattr(staff, field, request.data[field])
+                locations = None
+            
+                # Update locations if provided
+                if location_ids is not None:
                     # Ensure at least one location is assigned
-                    if not request.data['location_ids']:
-                        logger.warning(f"Attempt to update staff member without assigning locations")
+                    if not location_ids:
+                        logger.warning("Attempt to update staff member without assigning locations")
                         return Response(
                             {'error': 'At least one location must be assigned to a staff member'},
                             status=status.HTTP_400_BAD_REQUEST
                         )
-            
-            # Update fields
-            for field in ['first_name', 'last_name', 'email']:
-                if field in request.data:
-                    setattr(staff, field, request.data[field])
-            
-            # Update locations if provided
-            if 'location_ids' in request.data:
-                # Ensure at least one location is assigned
-                if not request.data['location_ids']:
-                    logger.warning(f"Attempt to update staff member without assigning locations")
-                    return Response(
-                        {'error': 'At least one location must be assigned to a staff member'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
                     
-                locations = LocationModel.objects.filter(id__in=request.data['location_ids'])
-                staff.locations.set(locations)
+                    # One query validates the ids, supplies the primary keys for set() and the response rows
+                    locations = list(LocationModel.objects.filter(id__in=location_ids).values('id', 'name'))
+                    valid_ids = {loc['id'] for loc in locations}
+                    if missing_ids := location_ids - valid_ids:
+                        logger.warning("Attempt to assign staff member to invalid locations: %s", missing_ids)
+                        return Response(
+                            {'error': 'One or more location IDs are invalid', 'invalid_location_ids': sorted(missing_ids)},
+                            status=status.HTTP_400_BAD_REQUEST
+                        )
+                    staff.locations.set(valid_ids)
             
-            # Update password if provided
-            if 'password' in request.data:
-                staff.set_password(request.data['password'])
+                # Update password if provided
+                if 'password' in request.data:
+                    staff.set_password(request.data['password'])
+                    changed.append('password')
             
-            staff.save()
+                # Location changes are persisted by the M2M manager, only save the row if a column changed
+                if changed:
+                    staff.save(update_fields=changed)
             
-            # Return updated staff data with locations
-            locations = list(staff.locations.values('id', 'name'))
+            # Return updated staff data with locations, only query them if they weren't just replaced
+            if locations is None:
+                locations = list(staff.locations.values('id', 'name'))
             
-            logger.info(f"Staff member {staff.email} updated by {request.user.email}")
+            logger.info("Staff member %s updated by %s", staff.email, request.user.email)
             return Response({
                 'message': 'Staff member updated successfully',
                 'id': staff.id,
@@ -303,9 +381,12 @@ class StaffView(APIView):
                 'locations': locations
             })
             
-        except Exception as e:
-            logger.error(f"Error updating staff member: {str(e)}")
+        except (Http404, ValueError) as e:
+            logger.error("Error updating staff member: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+        except (DatabaseError, TypeError) as e:
+            logger.error("Error updating staff member: %s", e)
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request):
         """Delete staff member"""
@@ -317,16 +398,12 @@ class StaffView(APIView):
             )
 
         try:
-            staff = get_object_or_404(User, id=request.query_params['id'], is_staff_member=True)
+            staff = get_object_or_404(User.staff_members, id=request.query_params['id'])
             
             # Check if franchise admin has access to this staff member
             if request.user.is_franchise_admin:
-                admin_locations = request.user.locations.all()
-                staff_locations = staff.locations.all()
-                
-                # Check if there's an overlap in locations
-                if not any(loc in admin_locations for loc in staff_locations):
-                    logger.warning(f"Franchise admin {request.user.email} attempted to delete unauthorized staff {staff.email}")
+                if not _shares_location(request.user, staff):
+                    logger.warning("Franchise admin %s attempted to delete unauthorized staff %s", request.user.email, staff.email)
                     return Response(
                         {'error': 'You do not have access to this staff member'},
                         status=status.HTTP_403_FORBIDDEN
@@ -334,12 +411,12 @@ class StaffView(APIView):
             
             staff_email = staff.email
             staff.delete()
-            logger.warning(f"Staff member {staff_email} deleted by {request.user.email}")
+            logger.warning("Staff member %s deleted by %s", staff_email, request.user.email)
             return Response(
                 {'message': 'Staff member deleted successfully'},
                 status=status.HTTP_204_NO_CONTENT
             )
             
-        except Exception as e:
-            logger.error(f"Error deleting staff member: {str(e)}")
+        except (Http404, ValueError) as e:
+            logger.error("Error deleting staff member: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND) 
\ No newline at end of file
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pos.apps.accounts'
+
+    def ready(self):
+        # Registers the cache invalidation receivers
+        from pos.apps.accounts import signals  # noqa: F401
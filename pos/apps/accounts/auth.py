@@ -13,11 +13,11 @@ class BlacklistJWTAuthentication(JWTAuthentication):
         # First validate the token using parent method
         validated_token = super().get_validated_token(raw_token)
 
-        print(f"Checking token with JTI: {validated_token['jti']}")
+        logger.debug("Checking token with JTI: %s", validated_token['jti'])
         
         # Check if token is blacklisted
         if BlacklistedToken.objects.filter(jti=validated_token["jti"]).exists():
-            logger.warning(f"Attempt to use blacklisted token: {validated_token['jti']}")
+            logger.warning("Attempt to use blacklisted token: %s", validated_token['jti'])
             raise InvalidToken("Session ended. Please log in again to access this resource.")
             
         return validated_token
\ No newline at end of file
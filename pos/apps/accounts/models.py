@@ -1,9 +1,11 @@
 # accounts/models.py
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
 
+from pos.apps.accounts.utils import get_user_location_ids
+
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
         """Creates and saves a regular user with the given email and password"""
@@ -32,12 +34,30 @@ class UserManager(BaseUserManager):
         if extra_fields.get('is_staff_member') is not True:
             raise ValueError('Staff user must have is_staff_member=True')
         
-        user = self.create_user(email, password, **extra_fields)
-        
-        if locations:
-            user.locations.set(locations)
+        # Create the user and its location links together or not at all
+        with transaction.atomic(using=self.db):
+            user = self.create_user(email, password, **extra_fields)
+            
+            if locations:
+                # Fresh user has no links yet, add() skips the diff query set() would run
+                user.locations.add(*locations)
             
         return user
+
+
+class RoleManager(models.Manager):
+    """Users with the given role flag set, loading just the columns the role views use"""
+    def __init__(self, role_flag):
+        super().__init__()
+        self.role_flag = role_flag
+
+    def get_queryset(self):
+        # Role flags are read by User.save(), keep them loaded to avoid deferred fetches
+        return super().get_queryset().filter(**{self.role_flag: True}).only(
+            'id', 'email', 'first_name', 'last_name',
+            'is_super_admin', 'is_franchise_admin', 'is_staff_member'
+        )
+
  
 class User(AbstractBaseUser):
     email = models.EmailField('email address', unique=True)
@@ -53,10 +73,28 @@ class User(AbstractBaseUser):
     is_logged_in = models.BooleanField(default=False)
     
     objects = UserManager()
+    franchise_admins = RoleManager('is_franchise_admin')
+    staff_members = RoleManager('is_staff_member')
     
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name']
     
+    class Meta:
+        indexes = [
+            # Franchise admin lookups and listings only ever look at rows with the flag set
+            models.Index(
+                fields=['id'],
+                name='user_fa_idx',
+                condition=models.Q(is_franchise_admin=True),
+            ),
+            # Same for staff lookups and listings
+            models.Index(
+                fields=['id'],
+                name='user_staff_idx',
+                condition=models.Q(is_staff_member=True),
+            ),
+        ]
+    
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.email})"
     
@@ -64,7 +102,12 @@ class User(AbstractBaseUser):
         """Check if user has access to a specific location"""
         if self.is_super_admin:
             return True
-        return self.locations.filter(id=location_id).exists()
+        try:
+            location_id = int(location_id)
+        except (TypeError, ValueError):
+            return False
+        # Uses the cached id set, repeated checks in a request cost no queries
+        return location_id in get_user_location_ids(self)
     
     def save(self, *args, **kwargs):
         """Ensure role consistency on save"""
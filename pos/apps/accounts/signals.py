@@ -0,0 +1,45 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, pre_delete
+from django.dispatch import receiver
+
+from pos.apps.accounts.models import User
+from pos.apps.accounts.utils import invalidate_user_location_ids
+from pos.apps.locations.models import LocationModel
+
+
+def _invalidate(user_id):
+    transaction.on_commit(partial(invalidate_user_location_ids, user_id))
+
+
+@receiver(m2m_changed, sender=User.locations.through)
+def user_locations_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Drop cached location ids whenever a user's locations change, from either side of the relation"""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            _invalidate(instance.pk)
+        return
+
+    # Changed through location.user_set, pk_set holds the affected user ids
+    if action == 'pre_clear':
+        # pk_set is None on clear, collect the users before their links are removed
+        instance._cleared_user_ids = list(instance.user_set.values_list('id', flat=True))
+    elif action == 'post_clear':
+        for user_id in getattr(instance, '_cleared_user_ids', ()):
+            _invalidate(user_id)
+    elif action in ('post_add', 'post_remove'):
+        for user_id in pk_set or ():
+            _invalidate(user_id)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    _invalidate(instance.pk)
+
+
+@receiver(pre_delete, sender=LocationModel)
+def location_deleted(sender, instance, **kwargs):
+    """Deleting a location cascades its M2M rows without m2m_changed, so invalidate here"""
+    for user_id in instance.user_set.values_list('id', flat=True):
+        _invalidate(user_id)
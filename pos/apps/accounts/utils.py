@@ -0,0 +1,53 @@
+from django.core.cache import cache
+
+from pos.utils.cache import bump_version, versioned_cache_key
+
+# How long a user's location ids stay cached (seconds)
+USER_LOCATIONS_CACHE_TIMEOUT = 300
+
+# Franchise admin list responses are cached briefly and dropped on any admin or location write
+FRANCHISE_ADMIN_LIST_CACHE_TIMEOUT = 60
+_FRANCHISE_ADMIN_LIST_CACHE_PREFIX = 'fa_list'
+
+
+def _user_locations_cache_key(user_id):
+    return f"user_locs:{user_id}"
+
+
+def get_user_location_ids(user):
+    """
+    Return the ids of the locations assigned to the user as a frozenset.
+
+    The result is kept in the cache so authorization checks on write
+    endpoints don't hit the M2M table on every request, and memoized on the
+    user instance so repeated checks within one request skip the cache too.
+    """
+    location_ids = getattr(user, '_location_ids', None)
+    if location_ids is not None:
+        return location_ids
+
+    key = _user_locations_cache_key(user.id)
+    location_ids = cache.get(key)
+    if location_ids is None:
+        location_ids = frozenset(user.locations.values_list('id', flat=True))
+        cache.set(key, location_ids, USER_LOCATIONS_CACHE_TIMEOUT)
+    user._location_ids = location_ids
+    return location_ids
+
+
+def invalidate_user_location_ids(user_id):
+    """Drop the cached location ids for the user, call after changing their locations"""
+    cache.delete(_user_locations_cache_key(user_id))
+
+
+def franchise_admin_list_cache_key(role, location_ids=()):
+    """Cache key for a franchise admin list, scoped by role and the requester's location set"""
+    return versioned_cache_key(_FRANCHISE_ADMIN_LIST_CACHE_PREFIX, role, location_ids)
+
+
+def invalidate_franchise_admin_lists():
+    """
+    Bump the version so every cached franchise admin list goes stale. Lists embed
+    location names, so call it after location changes as well as admin changes.
+    """
+    bump_version(_FRANCHISE_ADMIN_LIST_CACHE_PREFIX)
@@ -1,26 +1,36 @@
 from django.http import JsonResponse
 from rest_framework.views import APIView
-import json
 from django.core.exceptions import ObjectDoesNotExist
-from pos.utils.permissions import IsSuperAdmin
+from django.db import DatabaseError, connection, transaction
+from pos.utils.permissions import IsSuperAdmin, IsSuperOrFranchiseAdmin
 from pos.utils.logger import POSLogger
+from pos.utils.pagination import paginate
+from pos.utils.renderers import ORJSONRenderer
 from rest_framework.response import Response
 from rest_framework import status
 from django.views.decorators.http import require_GET
 from pos.apps.accounts.models import User
+from pos.apps.accounts.utils import invalidate_franchise_admin_lists, invalidate_user_location_ids
 
 
 from pos.apps.locations.models import LocationModel
+from pos.apps.locations.utils import get_location_names_list, invalidate_location_names
+from pos.apps.menu.utils import invalidate_category_lists, invalidate_menu_item_lists
 
 logger = POSLogger(__name__)
 
+# Columns returned for a location in list and detail responses
+LOCATION_LIST_FIELDS = ('id', 'name', 'city', 'state', 'address', 'phone')
+
+
 @require_GET
 def get_location_names(request):
     try:
-        locations = LocationModel.objects.values('name','id')
+        # Public list shared by every caller, cached until a location is saved or deleted
+        locations = get_location_names_list()
         logger.info("All location names accessed")
-        return JsonResponse(list(locations), safe=False)
-    except Exception as e:
+        return JsonResponse(locations, safe=False)
+    except DatabaseError as e:
         logger.error(f"Error retrieving location names: {str(e)}")
         return JsonResponse({'error': 'Error retrieving locations'}, status=500)
 
@@ -35,60 +45,58 @@ class LocationView(APIView):
     - PATCH: Update location
     - DELETE: Delete location
     
-    Protected: Only super admins can access this view
+    Protected: Only super admins can access this view,
+    franchise admins can read their own locations
     """
     
+    renderer_classes = [ORJSONRenderer]
+
+    def get_permissions(self):
+        if self.request.method == 'GET':
+            return [IsSuperOrFranchiseAdmin()]
+        return [IsSuperAdmin()]
+
     def get(self, request):
         """Get all locations or specific one if ID provided"""
         location_id = request.GET.get('id')
 
         user = request.user
-        if not (request.user.is_super_admin or request.user.is_franchise_admin):
-            return Response({'error': 'not authorized'})
         if location_id:
+                try:
+                    location_id = int(location_id)
+                except ValueError:
+                    return Response({'error': 'Invalid location ID'}, status=400)
                 if request.user.is_franchise_admin:
+                    # Set lookup against the cached location ids, no query
                     if not request.user.has_location_access(location_id):
                         logger.warning(f"Franchise admin {request.user.email} attempted to access unauthorized location {location_id}")
-                        return JsonResponse({'error': 'You do not have access to this location'}, status=403)
+                        return Response({'error': 'You do not have access to this location'}, status=403)
                 try:
-                    location = LocationModel.objects.get(id=location_id)
-                    logger.info(f"Location {location.id} details accessed by {user.email}")
-                    return JsonResponse({
-                        'id': location.id,
-                        'name': location.name,
-                        'address': location.address,
-                        'city': location.city,
-                        'state': location.state,
-                    })
+                    location = LocationModel.objects.values(*LOCATION_LIST_FIELDS).get(id=location_id)
+                    logger.info(f"Location {location['id']} details accessed by {user.email}")
+                    return Response(location)
                 except ObjectDoesNotExist:
                     logger.warning(f"Attempt to access non-existent location {location_id}")
-                    return JsonResponse({'error': 'Location not found'}, status=404)
+                    return Response({'error': 'Location not found'}, status=404)
         # Super Admin: all locations
         if user.is_super_admin:
-            
-                locations = list(LocationModel.objects.values(
-                    'id', 'name', 'city', 'state', 'address', 'phone',
-                ))
-                return JsonResponse(locations, safe=False)
+            locations = LocationModel.objects.values(*LOCATION_LIST_FIELDS)
         # Franchise Admin: only their locations
-        elif user.is_franchise_admin:
-                locations = list(user.locations.values(
-                    'id', 'name', 'city', 'state', 'address', 'phone',
-                ))
-                return JsonResponse(locations, safe=False)
-        # Staff: deny access
-        elif user.is_staff_member:
-            return JsonResponse({'error': 'fuck off'}, status=403)
-        # Default: deny access
         else:
-            return JsonResponse({'error': 'Not authorized'}, status=403)
+            locations = user.locations.values(*LOCATION_LIST_FIELDS)
+        try:
+            locations = paginate(locations, request)
+        except ValueError:
+            return Response({'error': 'limit and offset must be non-negative integers'}, status=400)
+        return Response(list(locations))
 
     def post(self, request):
         """Create new location with optional fields"""
-        if not request.user.is_super_admin:
-            return Response({"error":"not allowed"})
         try:
-            data = json.loads(request.body)
+            # DRF parses the body once, malformed JSON raises ParseError which it turns into a 400
+            data = request.data
+            if not isinstance(data, dict):
+                return Response({'error': 'Request body must be a JSON object'}, status=400)
             
             # Create with any provided fields
             location = LocationModel.objects.create(
@@ -100,54 +108,52 @@ class LocationView(APIView):
                 phone = data.get('phone', None)
             )
             logger.info(f"New location '{location.name}' created by {request.user.email}")
-            return JsonResponse({'id': location.id, 'status': 'created'}, status=201)
-        except json.JSONDecodeError:
-            logger.error(f"Invalid JSON in location creation request")
-            return JsonResponse({'error': 'Invalid JSON'}, status=400)
-        except Exception as e:
+            return Response({'id': location.id, 'status': 'created'}, status=201)
+        # DatabaseError also covers IntegrityError and DataError (e.g. a name over max_length)
+        except (DatabaseError, ValueError, TypeError) as e:
             logger.error(f"Error creating location: {str(e)}")
-            return JsonResponse({'error': str(e)}, status=400)
+            return Response({'error': str(e)}, status=400)
 
     def patch(self, request):
         """Update location with only provided fields"""
+        data = request.data
+        if not isinstance(data, dict):
+            return Response({'error': 'Request body must be a JSON object'}, status=400)
+        
+        if 'id' not in data:
+            logger.warning("Attempt to update location without providing ID")
+            return Response({'error': 'Location ID required'}, status=400)
+
         try:
-            data = json.loads(request.body)
+            location = LocationModel.objects.get(id=data['id'])
             
-            if 'id' not in data:
-                logger.warning("Attempt to update location without providing ID")
-                return JsonResponse({'error': 'Location ID required'}, status=400)
-
-            try:
-                location = LocationModel.objects.get(id=data['id'])
-                
-                # Update only provided fields
-                if 'name' in data:
-                    location.name = data['name']
-                if 'address' in data:
-                    location.address = data['address']
-                if 'city' in data:
-                    location.city = data['city']
-                if 'state' in data:
-                    location.state = data['state']
-                if 'password' in data:
-                    location.password = data['password']
-                
-                location.save()
-                logger.info(f"Location '{location.name}' updated by {request.user.email}")
-                return JsonResponse({'status': 'updated'})
-            except ObjectDoesNotExist:
-                logger.warning(f"Attempt to update non-existent location {data['id']}")
-                return JsonResponse({'error': 'Location not found'}, status=404)
-                
-        except json.JSONDecodeError:
-            logger.error("Invalid JSON in location update request")
-            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+            # Update only provided fields
+            if 'name' in data:
+                location.name = data['name']
+            if 'address' in data:
+                location.address = data['address']
+            if 'city' in data:
+                location.city = data['city']
+            if 'state' in data:
+                location.state = data['state']
+            if 'password' in data:
+                location.password = data['password']
+            
+            location.save()
+            logger.info(f"Location '{location.name}' updated by {request.user.email}")
+            return Response({'status': 'updated'})
+        except ObjectDoesNotExist:
+            logger.warning(f"Attempt to update non-existent location {data['id']}")
+            return Response({'error': 'Location not found'}, status=404)
+        except (DatabaseError, ValueError, TypeError) as e:
+            logger.error(f"Error updating location: {str(e)}")
+            return Response({'error': str(e)}, status=400)
 
     def delete(self, request):
         """
         Delete locations:
         - If ID is provided: delete specific location
-        - If no ID: delete all locations
+        - If no ID and ?confirm=1: delete all locations
         """
         location_id = request.GET.get('id')
         
@@ -158,12 +164,30 @@ class LocationView(APIView):
                 location_name = location.name
                 location.delete()
                 logger.info(f"Location '{location_name}' deleted by {request.user.email}")
-                return JsonResponse({'status': f'Location {location_id} deleted'})
+                return Response({'status': f'Location {location_id} deleted'})
             except ObjectDoesNotExist:
                 logger.warning(f"Attempt to delete non-existent location {location_id}")
-                return JsonResponse({'error': 'Location not found'}, status=404)
+                return Response({'error': 'Location not found'}, status=404)
         else:
-            # Delete all locations
-            count, _ = LocationModel.objects.all().delete()
+            if request.GET.get('confirm') != '1':
+                return Response({'error': 'Deleting all locations requires ?confirm=1'}, status=400)
+
+            # Every FK chain below locations is a non-null CASCADE, so TRUNCATE ... CASCADE
+            # removes the same rows as a queryset delete without walking them in Python
+            with transaction.atomic():
+                count = LocationModel.objects.count()
+                user_ids = list(User.locations.through.objects.values_list('user_id', flat=True).distinct())
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'TRUNCATE TABLE {connection.ops.quote_name(LocationModel._meta.db_table)} CASCADE'
+                    )
+
+            # TRUNCATE sends no delete signals, drop the caches they would have cleared
+            invalidate_location_names()
+            invalidate_category_lists()
+            invalidate_menu_item_lists()
+            invalidate_franchise_admin_lists()
+            for user_id in user_ids:
+                invalidate_user_location_ids(user_id)
             logger.warning(f"All locations ({count}) deleted by {request.user.email}")
-            return JsonResponse({'status': f'All locations deleted', 'count': count})
\ No newline at end of file
+            return Response({'status': f'All locations deleted', 'count': count})
\ No newline at end of file
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class LocationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pos.apps.locations'
+
+    def ready(self):
+        # Registers the cache invalidation receivers
+        from pos.apps.locations import signals  # noqa: F401
@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from pos.apps.accounts.utils import invalidate_franchise_admin_lists
+from pos.apps.locations.models import LocationModel
+from pos.apps.locations.utils import invalidate_location_names
+
+
+@receiver(post_save, sender=LocationModel)
+@receiver(post_delete, sender=LocationModel)
+def location_changed(sender, **kwargs):
+    transaction.on_commit(invalidate_location_names)
+    # Franchise admin lists embed location names
+    transaction.on_commit(invalidate_franchise_admin_lists)
@@ -0,0 +1,21 @@
+from django.core.cache import cache
+
+from pos.apps.locations.models import LocationModel
+
+# How long the public location names list stays cached (seconds)
+LOCATION_NAMES_CACHE_TIMEOUT = 300
+_LOCATION_NAMES_CACHE_KEY = 'location_names'
+
+
+def get_location_names_list():
+    """Return the id and name of every location, served from the cache when possible"""
+    names = cache.get(_LOCATION_NAMES_CACHE_KEY)
+    if names is None:
+        names = list(LocationModel.objects.values('name', 'id'))
+        cache.set(_LOCATION_NAMES_CACHE_KEY, names, LOCATION_NAMES_CACHE_TIMEOUT)
+    return names
+
+
+def invalidate_location_names():
+    """Drop the cached location names, call after creating, renaming or deleting a location"""
+    cache.delete(_LOCATION_NAMES_CACHE_KEY)
@@ -1,85 +1,101 @@
+import hashlib
+
+import orjson
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from pos.apps.menu.models import CategoryModel
-from pos.apps.accounts.models import User
-from pos.apps.locations.models import LocationModel
+from pos.apps.menu.utils import CATEGORY_LIST_CACHE_TIMEOUT, category_list_cache_key
+from pos.apps.accounts.utils import get_user_location_ids
+from django.core.cache import cache
+from django.db import IntegrityError
 from django.shortcuts import get_object_or_404
+from pos.utils.http import etag_matches
 from pos.utils.logger import POSLogger
+from pos.utils.permissions import HasPOSRole, IsSuperOrFranchiseAdmin
+from pos.utils.renderers import ORJSONRenderer
 
 logger = POSLogger(__name__)
 
 class CategoryView(APIView):
+    renderer_classes = [ORJSONRenderer]
+
+    def get_permissions(self):
+        if self.request.method == 'GET':
+            return [HasPOSRole()]
+        return [IsSuperOrFranchiseAdmin()]
+
     def get(self, request):
         """Get all categories"""
-        logger.info(f"hi this is the test code \n\n\n")
-        
-        if request.user.is_super_admin:
-            categories = CategoryModel.objects.all().order_by('display_order')
-            data = [{
-                'id': category.id,
-                'name': category.name,
-                'location_id': category.location.id,
-                'display_order': category.display_order
-            } for category in categories]
-            
-            logger.info(f"Returning categories: {data}")  # ✅ Log added here
-            return Response({'categories': data})
+        user = request.user
+        if user.is_super_admin:
+            cache_key = category_list_cache_key('all')
+            categories = CategoryModel.objects.all()
         
-        elif request.user.is_franchise_admin or request.user.is_staff_member:
-            requester = get_object_or_404(User, id=request.user.id)
-            categories = CategoryModel.objects.filter(location__in=requester.locations.all()).order_by('display_order')
-            data = [{
-                'id': category.id,
-                'name': category.name,
-                'location_id': category.location.id,
-                'display_order': category.display_order
-            } for category in categories]
+        else:
+            location_ids = get_user_location_ids(user)
+            cache_key = category_list_cache_key('locations', location_ids)
+            categories = CategoryModel.objects.filter(location_id__in=location_ids)
 
-            logger.info(f"Returning categories: {data}")  # ✅ Log added here
-            return Response({'categories': data})
-        
+        # The ETag is a hash of the payload itself, cached with it, so an evicted
+        # version counter can never make a client keep a stale list
+        cached = cache.get(cache_key)
+        if cached is None:
+            data = list(categories.values('id', 'name', 'location_id', 'display_order').order_by('display_order'))
+            etag = '"{}"'.format(hashlib.md5(orjson.dumps(data)).hexdigest())
+            cache.set(cache_key, (data, etag), CATEGORY_LIST_CACHE_TIMEOUT)
         else:
-            logger.warning(f"Unauthorized user {request.user.email} tried to access categories")  # Optional
-            return Response({'error': 'not allowed'})
+            data, etag = cached
+
+        if etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            response['ETag'] = etag
+            return response
+
+        logger.info("Categories accessed by %s: %d categories", user.email, len(data))
+        response = Response({'categories': data})
+        response['ETag'] = etag
+        return response
 
         
 
 
     def post(self, request):
         """Create a new category"""
+        user = request.user
         try:
-            requested_location = LocationModel.objects.get(id=request.data.get('location_id'))
-            if request.user.is_super_admin:
+            # The FK is assigned by id, a missing location surfaces as an IntegrityError on insert
+            location_id = int(request.data.get('location_id'))
+            if user.is_super_admin:
                 category = CategoryModel.objects.create(
                     name=request.data.get('name'),
                     display_order=request.data.get('display_order', 0),
-                    location=requested_location
+                    location_id=location_id
                 )
                 return Response({
                     'status': 'success',
                     'id': category.id,
                     'name': category.name
                 }, status=status.HTTP_201_CREATED)
-            elif request.user.is_franchise_admin:
-                admin = get_object_or_404(User, id = request.user.id, is_franchise_admin = True)
-                locations = list(admin.locations.values('id','name'))
-                logger.info(f"\n\n the requested id is {requested_location} \n\n and the access to admin are {locations} \n\n")
-                if requested_location.id not in [loc['id'] for loc in locations]:
+            else:
+                if location_id not in get_user_location_ids(user):
                     return Response({'error': 'Did not have access for that location'})
 
                 category = CategoryModel.objects.create(
                     name=request.data.get('name'),
                     display_order = request.data.get('display_order', 0),
-                    location= requested_location
+                    location_id=location_id
                 )
                 return Response({
                     'status': 'success',
                     'id': category.id,
                     'name': category.name
                 }, status=status.HTTP_201_CREATED)
-            else:
-                return Response({'error': 'not allowed '})
+        except IntegrityError:
+            return Response(
+                {'status': 'error', 'message': 'Location not found'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         except Exception as e:
             return Response(
                 {'status': 'error', 'message': str(e)},
@@ -87,6 +103,7 @@ class CategoryView(APIView):
             )
     def patch(self, request):
         """Update an existing category"""
+        user = request.user
         logger.info("Category update request received")
         
         if 'id' not in request.data:
@@ -95,20 +112,18 @@ class CategoryView(APIView):
             
         try:
             category = get_object_or_404(CategoryModel, id=request.data['id'])
+            current_location_id = category.location_id
             
-            if request.user.is_super_admin:
+            if user.is_super_admin:
                 # Super admin can update freely
                 pass
-            elif request.user.is_franchise_admin:
+            else:
                 # Franchise admin can only update categories in their locations
-                admin = get_object_or_404(User, id=request.user.id, is_franchise_admin=True)
-                admin_locations = set(admin.locations.values_list('id', flat=True))
-                if category.location.id not in admin_locations:
-                    logger.warning(f"{request.user.email} unauthorized to update this category")
+                admin_locations = get_user_location_ids(user)
+                if current_location_id not in admin_locations:
+                    logger.warning("%s unauthorized to update this category", user.email)
                     return Response({'error': 'Unauthorized to update this category'}, 
                                    status=status.HTTP_403_FORBIDDEN)
-            else:
-                return Response({'error': 'Not allowed'}, status=status.HTTP_403_FORBIDDEN)
             
             # Update fields
             if 'name' in request.data:
@@ -116,18 +131,20 @@ class CategoryView(APIView):
             if 'display_order' in request.data:
                 category.display_order = request.data['display_order']
             if 'location_id' in request.data:
-                new_location = get_object_or_404(LocationModel, id=request.data['location_id'])
-                
-                if request.user.is_franchise_admin:
-                    admin_locations = set(request.user.locations.values_list('id', flat=True))
-                    if new_location.id not in admin_locations:
-                        return Response({'error': 'Cannot assign unauthorized location'}, 
-                                       status=status.HTTP_403_FORBIDDEN)
+                new_location_id = int(request.data['location_id'])
                 
-                category.location = new_location
+                # Clients often resend the current location, it was already authorized above
+                if new_location_id != current_location_id:
+                    if not user.is_super_admin:
+                        if new_location_id not in admin_locations:
+                            return Response({'error': 'Cannot assign unauthorized location'}, 
+                                           status=status.HTTP_403_FORBIDDEN)
+                    
+                    # Assign the FK by id, a missing location fails the save with an IntegrityError
+                    category.location_id = new_location_id
             
             category.save()
-            logger.info(f"Category {category.name} updated by {request.user.email}")
+            logger.info("Category %s updated by %s", category.name, user.email)
             
             return Response({
                 'status': 'success',
@@ -135,13 +152,16 @@ class CategoryView(APIView):
                 'category': {
                     'id': category.id,
                     'name': category.name,
-                    'location_id': category.location.id,
+                    'location_id': category.location_id,
                     'display_order': category.display_order
                 }
             })
             
+        except IntegrityError:
+            logger.warning("Attempt to move category to non-existent location %s", request.data.get('location_id'))
+            return Response({'error': 'Location not found'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
-            logger.error(f"Error updating category: {str(e)}")
+            logger.error("Error updating category: %s", e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_404_NOT_FOUND
@@ -149,35 +169,32 @@ class CategoryView(APIView):
     
     def delete(self, request):
         """Permanently delete category from database"""
+        user = request.user
         logger.info("Category delete request received")
-        logger.info(f"Request query params: {request.query_params}")
-        logger.info(f"User: {request.user.email}, Method: {request.method}")
         
         if 'id' not in request.query_params:
             logger.warning("Attempt to delete category without providing ID")
             return Response({'error': 'Specify ?id=<category_id>'}, status=status.HTTP_400_BAD_REQUEST)
             
         try:
-            category = get_object_or_404(CategoryModel, id=request.query_params['id'])
+            category = get_object_or_404(
+                CategoryModel.objects.only('id', 'name', 'location_id'),
+                id=request.query_params['id']
+            )
             
-            if request.user.is_super_admin:
-                pass  # Full access
-            elif request.user.is_franchise_admin:
-                admin = get_object_or_404(User, id=request.user.id, is_franchise_admin=True)
-                admin_locations = set(admin.locations.values_list('id', flat=True))
-                if category.location.id not in admin_locations:
-                    logger.warning(f"{request.user.email} unauthorized to delete this category")
+            # Super admins have full access, franchise admins only within their locations
+            if not user.is_super_admin:
+                if category.location_id not in get_user_location_ids(user):
+                    logger.warning("%s unauthorized to delete this category", user.email)
                     return Response({'error': 'Unauthorized to delete this category'}, 
                                   status=status.HTTP_403_FORBIDDEN)
-            else:
-                return Response({'error': 'Not allowed'}, status=status.HTTP_403_FORBIDDEN)
             
             category_name = category.name
             category.delete()
-            logger.warning(f"Category {category_name} deleted by {request.user.email}")
+            logger.warning("Category %s deleted by %s", category_name, user.email)
             
             return Response({'message': 'Category permanently deleted'}, status=status.HTTP_204_NO_CONTENT)
             
         except Exception as e:
-            logger.error(f"Error deleting category: {str(e)}")
+            logger.error("Error deleting category: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
@@ -1,100 +1,143 @@
-from django.shortcuts import get_object_or_404
+import base64
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from pos.apps.accounts.models import User
+from pos.apps.accounts.utils import get_user_location_ids
 from pos.apps.menu.models import MenuItemModel, CategoryModel
-from pos.apps.locations.models import LocationModel
+from pos.apps.menu.utils import (
+    MENU_ITEM_LIST_CACHE_TIMEOUT,
+    invalidate_menu_item_lists,
+    menu_item_list_cache_key,
+)
 from pos.utils.logger import POSLogger
+from pos.utils.permissions import HasPOSRole, IsSuperOrFranchiseAdmin
+
+logger = POSLogger(__name__)
+
+_REQUIRED_POST_FIELDS = frozenset({'name', 'price', 'category_id', 'location_id'})
+
+# Bad ids, prices or FK values from the client, answered with a 400
+_INVALID_INPUT_ERRORS = (ValueError, TypeError, ValidationError, IntegrityError)
+
+# Columns read for the menu item list, the category name comes through the join
+MENU_ITEM_LIST_FIELDS = ('id', 'name', 'price', 'image', 'category__name', 'location_id')
+
+
+def _encode_image(image):
+    # image is stored as raw bytes (BinaryField), send it base64 encoded
+    return base64.b64encode(image).decode('ascii') if image else None
+
+
+def _menu_item_rows(queryset):
+    """Build the list payload from a values() projection, no model instances are created"""
+    return [{
+        'id': row['id'],
+        'name': row['name'],
+        'price': float(row['price']),
+        'category': row['category__name'],
+        'location_id': row['location_id'],
+        'image': _encode_image(row['image'])
+    } for row in queryset.values(*MENU_ITEM_LIST_FIELDS)]
+
+
+def _update_menu_item(item_id, fields):
+    """
+    Write only the changed columns in a single UPDATE. update() sends no
+    post_save, so the cached lists are invalidated here instead.
+    """
+    if not fields:
+        return
+    MenuItemModel.objects.filter(pk=item_id).update(**fields)
+    transaction.on_commit(invalidate_menu_item_lists)
 
-logger = POSLogger()
 class MenuItemsView(APIView):
-    def get(self, request):
+    # Built once at import; .all() hands each request its own clone, so no results are shared
+    queryset = MenuItemModel.objects.all()
+
+    def get_permissions(self):
+        if self.request.method == 'GET':
+            return [HasPOSRole()]
+        return [IsSuperOrFranchiseAdmin()]
+
+    def get_queryset(self):
+        """Menu items the requester may access, scoped in SQL for everyone but super admins"""
+        user = self.request.user
+        queryset = self.queryset.all()
+        if not user.is_super_admin:
+            queryset = queryset.filter(location_id__in=get_user_location_ids(user))
+        return queryset
+
+    def get(self, request, item_id=None):
         """Get all menu items or specific item if ID provided"""
-        logger.info(f"i got called bow bow bow")
-        item_id = request.data.get('id')
+        user = request.user
+        # Reading the id from the URL keeps DRF from parsing a body on plain reads
+        item_id = item_id or request.query_params.get('id')
         
         if item_id:
-            try:
-                item = MenuItemModel.objects.get(pk=item_id, is_available=True)
-                if request.user.is_super_admin:
-                    data = {
-                        'id': item.id,
-                        'name': item.name,
-                        'price': float(item.price),
-                        'category': item.category.name,
-                        'location': item.location.id,
-                        'image': item.image.url if item.image else None
-                    }
-                    return Response(data)
-                elif request.user.is_franchise_admin:
-                    admin = get_object_or_404(User, id=request.user.id, is_franchise_admin=True)
-                    if item.location.id not in [loc['id'] for loc in list(admin.locations.values('id', 'name'))]:
-                        return Response({'error': 'not allowed'})
-                    data = {
-                        'id': item.id,
-                        'name': item.name,
-                        'price': float(item.price),
-                        'category': item.category.name,
-                        'location': item.location.id,
-                        'image': item.image.url if item.image else None
-                    }
-                    return Response(data)
-                else:
-                    return Response({'error': 'not allowed'})
-            except MenuItemModel.DoesNotExist:
+            row = self.get_queryset().filter(
+                pk=item_id, is_available=True
+            ).values(*MENU_ITEM_LIST_FIELDS).first()
+            if row is None:
                 return Response(
                     {'status': 'error', 'message': 'Menu item not found'},
                     status=status.HTTP_404_NOT_FOUND
                 )
+            return Response({
+                'id': row['id'],
+                'name': row['name'],
+                'price': float(row['price']),
+                'category': row['category__name'],
+                'location': row['location_id'],
+                'image': _encode_image(row['image'])
+            })
         
-        if request.user.is_super_admin:
-            items = MenuItemModel.objects.filter(is_available=True)
-        elif request.user.is_franchise_admin or request.user.is_staff_member:
-            requester = get_object_or_404(User, id=request.user.id)
-            items = MenuItemModel.objects.filter(
-                is_available=True,
-                location__in=requester.locations.all()
-            )
+        if user.is_super_admin:
+            cache_key = menu_item_list_cache_key('all')
         else:
-            return Response({'error': 'not allowed'})
-
-        data = [{
-            'id': item.id,
-            'name': item.name,
-            'price': float(item.price),
-            'category': item.category.name,
-            'location_id': item.location.id,
-            'image': item.image.url if item.image else None
-        } for item in items]
+            cache_key = menu_item_list_cache_key('locations', get_user_location_ids(user))
+        items = self.get_queryset().filter(is_available=True)
+
+        # The key is scoped to the requester's locations, so a hit never leaks other locations' items
+        data = cache.get(cache_key)
+        if data is None:
+            data = _menu_item_rows(items)
+            cache.set(cache_key, data, MENU_ITEM_LIST_CACHE_TIMEOUT)
         return Response({'menu_items': data})
 
     def post(self, request):
         """Create new menu item"""
-        try:
-            if not (request.user.is_super_admin or request.user.is_franchise_admin):
-                return Response({'error': 'not allowed'})
+        if not isinstance(request.data, dict):
+            return Response({'error': 'Request body must be a JSON object'}, status=status.HTTP_400_BAD_REQUEST)
+        if missing := _REQUIRED_POST_FIELDS - request.data.keys():
+            return Response(
+                {'error': f'Missing fields: {", ".join(sorted(missing))}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-            requested_loc = request.data.get('location_id')
-            category = CategoryModel.objects.get(id=request.data.get('category_id'))
-            
-            if category.location.id != requested_loc:
-                return Response({'error': 'category does not belong this location'})
-                
-            location = LocationModel.objects.get(id=requested_loc)
+        try:
+            requested_loc = int(request.data.get('location_id'))
+            category_id = int(request.data.get('category_id'))
             
+            user = request.user
             # Check location access for franchise admin
-            if request.user.is_franchise_admin:
-                admin = get_object_or_404(User, id=request.user.id, is_franchise_admin=True)
-                if requested_loc not in [loc['id'] for loc in list(admin.locations.values('id', 'name'))]:
+            if user.is_franchise_admin:
+                if requested_loc not in get_user_location_ids(user):
                     return Response({'error': 'does not have access to this location'})
 
+            # A category row with this location proves both exist and belong together
+            if not CategoryModel.objects.filter(pk=category_id, location_id=requested_loc).exists():
+                return Response({'error': 'category does not belong this location'})
+
             # Create menu item
             new_item = MenuItemModel.objects.create(
                 name=request.data.get('name'),
                 price=request.data.get('price'),
-                category=category,
-                location=location,
+                category_id=category_id,
+                location_id=requested_loc,
                 is_available=True
             )
             
@@ -104,33 +147,65 @@ class MenuItemsView(APIView):
                 'name': new_item.name
             }, status=status.HTTP_201_CREATED)
 
-        except Exception as e:
+        except _INVALID_INPUT_ERRORS as e:
             return Response(
                 {'status': 'error', 'message': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        except Exception:
+            logger.error("Error creating menu item", exc_info=True)
+            return Response(
+                {'status': 'error', 'message': 'Could not create menu item'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
 
-    def put(self, request):
+    def put(self, request, item_id=None):
         """Update menu item"""
+        user = request.user
         try:
-            item = MenuItemModel.objects.get(pk=request.data.get('id'))
-            if 'name' in request.data:
-                item.name = request.data.get('name')
-            if 'price' in request.data:
-                item.price = request.data.get('price')
-            if 'category_id' in request.data:
-                item.category = CategoryModel.objects.get(id=request.data.get('category_id'))
+            item_id = item_id or request.data.get('id')
+            item = self.get_queryset().values('location_id', 'category_id').get(pk=item_id)
+
+            fields = {name: request.data.get(name) for name in ('name', 'price') if name in request.data}
+            location_id = item['location_id']
             if 'location_id' in request.data:
-                item.location = LocationModel.objects.get(id=request.data.get('location_id'))
-            
-            item.save()
+                location_id = fields['location_id'] = int(request.data.get('location_id'))
+            category_id = item['category_id']
+            if 'category_id' in request.data:
+                category_id = fields['category_id'] = int(request.data.get('category_id'))
+
+            # The item itself is in scope, moving it still needs access to the target location
+            if not user.is_super_admin:
+                if location_id not in get_user_location_ids(user):
+                    return Response({'error': 'not allowed'}, status=status.HTTP_403_FORBIDDEN)
+
+            # One lookup covers both a missing category and one from another location
+            if 'category_id' in fields or 'location_id' in fields:
+                if not CategoryModel.objects.filter(pk=category_id, location_id=location_id).exists():
+                    return Response(
+                        {'error': 'category does not belong to this location'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+
+            _update_menu_item(item_id, fields)
             return Response({'status': 'success'})
-        
-        except Exception as e:
+
+        except MenuItemModel.DoesNotExist:
+            return Response(
+                {'status': 'error', 'message': 'Menu item not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except _INVALID_INPUT_ERRORS as e:
             return Response(
                 {'status': 'error', 'message': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        except Exception:
+            logger.error("Error updating menu item %s", item_id, exc_info=True)
+            return Response(
+                {'status': 'error', 'message': 'Could not update menu item'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
     def patch(self, request, item_id=None):
         """Partially update menu item"""
         try:
@@ -142,45 +217,32 @@ class MenuItemsView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            item = MenuItemModel.objects.get(pk=item_id)
-            
-            # Check permissions
-            if request.user.is_franchise_admin:
-                admin = get_object_or_404(User, id=request.user.id, is_franchise_admin=True)
-                if item.location.id not in [loc['id'] for loc in list(admin.locations.values('id', 'name'))]:
-                    return Response({'error': 'not allowed'}, status=status.HTTP_403_FORBIDDEN)
-            elif not request.user.is_super_admin:
-                return Response({'error': 'not allowed'}, status=status.HTTP_403_FORBIDDEN)
+            item = self.get_queryset().values('location_id').get(pk=item_id)
 
             # Update fields if they exist in request data
-            if 'name' in request.data:
-                item.name = request.data.get('name')
-            if 'price' in request.data:
-                item.price = request.data.get('price')
-            if 'is_available' in request.data:
-                item.is_available = request.data.get('is_available')
+            fields = {
+                name: request.data.get(name)
+                for name in ('name', 'price', 'is_available') if name in request.data
+            }
             if 'category_id' in request.data:
-                category = CategoryModel.objects.get(id=request.data.get('category_id'))
+                category_location_id = CategoryModel.objects.filter(
+                    pk=request.data.get('category_id')
+                ).values_list('location_id', flat=True).first()
+                if category_location_id is None:
+                    raise CategoryModel.DoesNotExist
                 # Verify category belongs to item's location
-                if category.location.id != item.location.id:
+                if category_location_id != item['location_id']:
                     return Response(
                         {'error': 'category does not belong to this location'},
                         status=status.HTTP_400_BAD_REQUEST
                     )
-                item.category = category
+                fields['category_id'] = request.data.get('category_id')
             
-            item.save()
+            _update_menu_item(item_id, fields)
             
             # Format response to match GET response structure
             data = {
-                "menu_items": [{
-                    'id': item.id,
-                    'name': item.name,
-                    'price': float(item.price),
-                    'category': item.category.name,
-                    'location_id': item.location.id,
-                    'image': item.image.url if item.image else None
-                }]
+                "menu_items": _menu_item_rows(MenuItemModel.objects.filter(pk=item_id))
             }
             
             return Response(data)
@@ -202,15 +264,26 @@ class MenuItemsView(APIView):
             )
         
 
-    def delete(self, request):
+    def delete(self, request, item_id=None):
         """delete menu item"""
         try:
-            item = MenuItemModel.objects.get(pk=request.data.get('id'))
+            item = self.get_queryset().get(pk=item_id or request.data.get('id'))
             item.delete()
             return Response({'status': 'success'})
         
-        except Exception as e:
+        except MenuItemModel.DoesNotExist:
+            return Response(
+                {'status': 'error', 'message': 'Menu item not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except (ValueError, TypeError) as e:
             return Response(
                 {'status': 'error', 'message': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception:
+            logger.error("Error deleting menu item %s", item_id, exc_info=True)
+            return Response(
+                {'status': 'error', 'message': 'Could not delete menu item'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
\ No newline at end of file
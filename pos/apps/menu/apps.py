@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MenuConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pos.apps.menu'
+
+    def ready(self):
+        # Registers the cache invalidation receivers
+        from pos.apps.menu import signals  # noqa: F401
@@ -0,0 +1,21 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from pos.apps.menu.models import CategoryModel, MenuItemModel
+from pos.apps.menu.utils import invalidate_category_lists, invalidate_menu_item_lists
+
+
+@receiver(post_save, sender=CategoryModel)
+@receiver(post_delete, sender=CategoryModel)
+def category_changed(sender, **kwargs):
+    # Wait for the commit so a concurrent request can't re-cache the old list in between
+    transaction.on_commit(invalidate_category_lists)
+    # Menu item lists carry the category name
+    transaction.on_commit(invalidate_menu_item_lists)
+
+
+@receiver(post_save, sender=MenuItemModel)
+@receiver(post_delete, sender=MenuItemModel)
+def menu_item_changed(sender, **kwargs):
+    transaction.on_commit(invalidate_menu_item_lists)
@@ -4,6 +4,7 @@ from .views import MenuItemsView, CategoryView
 urlpatterns = [
    
 path('menu-items/', MenuItemsView.as_view()),
+path('menu-items/<int:item_id>/', MenuItemsView.as_view()),
 path('categories/', CategoryView.as_view()), 
     
 ]
\ No newline at end of file
@@ -0,0 +1,32 @@
+from pos.utils.cache import bump_version, versioned_cache_key
+
+# Category lists are cached until a category changes, the timeout only bounds stale memory use
+CATEGORY_LIST_CACHE_TIMEOUT = 300
+_CATEGORY_CACHE_PREFIX = 'cat_list'
+
+# Menu item lists follow the same scheme, they also change when a category is renamed
+MENU_ITEM_LIST_CACHE_TIMEOUT = 300
+_MENU_ITEM_CACHE_PREFIX = 'menu_items'
+
+
+def category_list_cache_key(scope, location_ids=()):
+    """
+    Cache key for a category list, scoped by 'all' or the requester's location set.
+    The cached value is a (data, etag) pair, so the ETag follows the payload.
+    """
+    return versioned_cache_key(_CATEGORY_CACHE_PREFIX, scope, location_ids)
+
+
+def invalidate_category_lists():
+    """Bump the version so every cached category list goes stale"""
+    bump_version(_CATEGORY_CACHE_PREFIX)
+
+
+def menu_item_list_cache_key(scope, location_ids=()):
+    """Cache key for a menu item list, scoped by 'all' or the requester's location set"""
+    return versioned_cache_key(_MENU_ITEM_CACHE_PREFIX, scope, location_ids)
+
+
+def invalidate_menu_item_lists():
+    """Bump the version so every cached menu item list goes stale"""
+    bump_version(_MENU_ITEM_CACHE_PREFIX)
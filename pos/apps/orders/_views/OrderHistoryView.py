@@ -1,11 +1,80 @@
+import hashlib
+from datetime import datetime, timedelta
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
-from django.db.models import Q
+from django.db.models import CharField, Count, F, Max, Prefetch, Q, Value
+from django.db.models.functions import Concat
 from pos.apps.orders.models import Order, OrderItem
 from django.shortcuts import get_object_or_404
+from pos.apps.accounts.utils import get_user_location_ids
+from pos.utils.http import etag_matches
+from pos.utils.pagination import paginate
+
+def _start_of_day(value):
+    """Parse a YYYY-MM-DD query param into midnight of that day in the current timezone"""
+    return timezone.make_aware(datetime.strptime(value, '%Y-%m-%d'))
+
+# Most orders a single batch request may ask for
+ORDER_BATCH_MAX_IDS = 200
+
+
+def _order_detail_queryset(user):
+    """Orders the user may see, loaded with everything the detail response reads"""
+    # The order with its location and processor name, then all items with their menu item: two queries
+    # only() keeps both queries to the columns the detail response reads
+    orders = Order.objects.select_related('location').only(
+        'id', 'order_number', 'order_date', 'total_amount',
+        'location', 'location__name', 'processed_by'
+    ).annotate(
+        # Built by the database from the joined user row, no User instance is loaded
+        processor_name=Concat(
+            'processed_by__first_name', Value(' '), 'processed_by__last_name',
+            output_field=CharField()
+        )
+    ).prefetch_related(
+        Prefetch('items', queryset=OrderItem.objects.select_related('menu_item').only(
+            'id', 'order', 'quantity', 'price', 'menu_item', 'menu_item__name'
+        ))
+    )
+    if not user.is_super_admin:
+        # Only see orders from locations they have access to
+        orders = orders.filter(location_id__in=get_user_location_ids(user))
+    return orders
+
+
+def _serialize_order_detail(order):
+    order_items = [{
+        'id': item.id,
+        'menu_item_id': item.menu_item_id,
+        'quantity': item.quantity,
+        'price': item.price,
+        'menu_item__name': item.menu_item.name if item.menu_item_id else None,
+        'order_id': order.id
+    } for item in order.items.all()]
+    
+    data = {
+        'id': order.id,
+        'order_number': order.order_number,
+        'order_date': order.order_date,
+        'total_amount': order.total_amount,
+        'location': {
+            'id': order.location.id,
+            'name': order.location.name
+        },
+        'location_name': order.location.name,
+        'items': order_items
+    }
+    
+    # Add processor information if available
+    if order.processed_by_id:
+        data['processed_by'] = {
+            'id': order.processed_by_id,
+            'name': order.processor_name
+        }
+    return data
 
 class OrderHistoryView(APIView):
     permission_classes = [IsAuthenticated]
@@ -18,6 +87,7 @@ class OrderHistoryView(APIView):
             - date_from: Filter by date range (YYYY-MM-DD)
             - date_to: Filter by date range (YYYY-MM-DD)
             - order_id: Get specific order details
+            - limit, offset: Page through the order list (optional)
         """
         user = request.user
         order_id = request.query_params.get('order_id')
@@ -25,48 +95,8 @@ class OrderHistoryView(APIView):
         # If order_id is provided, return detailed information about that order
         if order_id:
             try:
-                # Apply permissions based on user role
-                if hasattr(user, 'is_super_admin') and user.is_super_admin:
-                    order = get_object_or_404(Order, id=order_id)
-                elif hasattr(user, 'is_franchise_admin') and (user.is_franchise_admin or user.is_staff_member):
-                    # Only see orders from locations they have access to
-                    user_locations = user.locations.all()
-                    order = get_object_or_404(Order, id=order_id, location__in=user_locations)
-                else:
-                    order = get_object_or_404(Order, id=order_id)
-                
-                # Get order items
-                order_items = order.items.all().values(
-                    'id', 'menu_item_id', 'quantity', 'price'
-                )
-                
-                # Add menu item name if available
-                for item in order_items:
-                    menu_item = order.items.get(id=item['id']).menu_item
-                    item['menu_item__name'] = menu_item.name if menu_item else None
-                    item['order_id'] = order.id
-                
-                response_data = {
-                    'id': order.id,
-                    'order_number': order.order_number,
-                    'order_date': order.order_date,
-                    'total_amount': order.total_amount,
-                    'location': {
-                        'id': order.location.id,
-                        'name': order.location.name
-                    },
-                    'location_name': order.location.name,
-                    'items': list(order_items)
-                }
-                
-                # Add processor information if available
-                if order.processed_by:
-                    response_data['processed_by'] = {
-                        'id': order.processed_by.id,
-                        'name': f"{order.processed_by.first_name} {order.processed_by.last_name}"
-                    }
-                
-                return Response(response_data)
+                order = get_object_or_404(_order_detail_queryset(user), id=order_id)
+                return Response(_serialize_order_detail(order))
             except Exception as e:
                 return Response({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
         
@@ -78,45 +108,87 @@ class OrderHistoryView(APIView):
             date_to = request.query_params.get('date_to')
             
             # Base queryset with role-based filtering
-            if hasattr(user, 'is_super_admin') and user.is_super_admin:
+            if user.is_super_admin:
                 orders = Order.objects.all()
-            elif hasattr(user, 'is_franchise_admin') and (user.is_franchise_admin or user.is_staff_member):
-                user_locations = user.locations.all()
-                orders = Order.objects.filter(location__in=user_locations)
             else:
-                orders = Order.objects.all()
+                orders = Order.objects.filter(location_id__in=get_user_location_ids(user))
             
             # Apply additional filters
             if location_id:
-                if not hasattr(user, 'is_super_admin') or user.is_super_admin or \
-                   (hasattr(user, 'locations') and user.locations.filter(id=location_id).exists()):
-                    orders = orders.filter(location_id=location_id)
-                else:
+                try:
+                    location_id = int(location_id)
+                except ValueError:
+                    return Response({"error": "location_id must be an integer"},
+                                   status=status.HTTP_400_BAD_REQUEST)
+                # Checked against the cached location ids, no extra query
+                if not user.is_super_admin and location_id not in get_user_location_ids(user):
                     return Response({"error": "You don't have access to this location"}, 
                                    status=status.HTTP_403_FORBIDDEN)
+                orders = orders.filter(location_id=location_id)
             
-            # Date range filtering
-            if date_from:
-                orders = orders.filter(order_date__gte=date_from)
-            if date_to:
-                orders = orders.filter(order_date__lte=f"{date_to} 23:59:59")
+            # Date range filtering, as a half-open range of aware datetimes so the order_date index applies
+            try:
+                if date_from:
+                    orders = orders.filter(order_date__gte=_start_of_day(date_from))
+                if date_to:
+                    orders = orders.filter(order_date__lt=_start_of_day(date_to) + timedelta(days=1))
+            except ValueError:
+                return Response({"error": "date_from and date_to must be YYYY-MM-DD"},
+                               status=status.HTTP_400_BAD_REQUEST)
             
-            # Order by date, newest first
-            orders = orders.order_by('-order_date')
+            # Orders are only ever added or removed, so newest date, highest id and count identify
+            # them, and the newest location updated_at catches a renamed location_name; one
+            # aggregate lets polling dashboards skip the list when nothing changed
+            summary = orders.aggregate(
+                latest=Max('order_date'), last_id=Max('id'), count=Count('id'),
+                location_updated=Max('location__updated_at'),
+            )
+            etag = '"{}"'.format(hashlib.md5(
+                f"{user.id}:{request.GET.urlencode()}:{summary['latest']}:{summary['last_id']}:{summary['count']}"
+                f":{summary['location_updated']}".encode()
+            ).hexdigest())
+            if etag_matches(request, etag):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+                response['ETag'] = etag
+                return response
             
-            # Serialize the data
-            response_data = []
-            for order in orders:
-                order_data = {
-                    'id': order.id,
-                    'order_number': order.order_number,
-                    'order_date': order.order_date,
-                    'total_amount': order.total_amount,
-                    'location_name': order.location.name,
-                }
-                response_data.append(order_data)
+            # Order by date, newest first; rows come straight from values(), the location name by join
+            orders = orders.values(
+                'id', 'order_number', 'order_date', 'total_amount', location_name=F('location__name')
+            )
+            try:
+                # id breaks ties between orders placed in the same instant so pages don't overlap
+                orders = paginate(orders, request, ordering=('-order_date', '-id'))
+            except ValueError:
+                return Response({"error": "limit and offset must be non-negative integers"},
+                               status=status.HTTP_400_BAD_REQUEST)
             
-            return Response(response_data)
+            response = Response(list(orders))
+            response['ETag'] = etag
+            return response
             
         except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR) 
\ No newline at end of file
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR) 
+
+
+class OrderHistoryBatchView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        """
+        Get details for several orders in one request
+        Params:
+            - ids: Comma separated order ids, at most ORDER_BATCH_MAX_IDS
+        """
+        try:
+            order_ids = [int(order_id) for order_id in request.query_params.get('ids', '').split(',') if order_id]
+        except ValueError:
+            return Response({"error": "ids must be comma separated integers"},
+                           status=status.HTTP_400_BAD_REQUEST)
+        if len(order_ids) > ORDER_BATCH_MAX_IDS:
+            return Response({"error": f"At most {ORDER_BATCH_MAX_IDS} ids per request"},
+                           status=status.HTTP_400_BAD_REQUEST)
+        
+        # Same loading as the detail view, orders outside the user's locations are simply left out
+        orders = _order_detail_queryset(request.user).filter(id__in=order_ids).order_by('-order_date', '-id')
+        return Response([_serialize_order_detail(order) for order in orders])
\ No newline at end of file
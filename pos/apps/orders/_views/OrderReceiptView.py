@@ -10,8 +10,9 @@ import random
 class OrderReceiptView(APIView):
     def get(self, request, order_id):
         try:
-            order = Order.objects.get(id=order_id)
-            items = OrderItem.objects.filter(order=order)
+            # Location name and every item's menu item come in with the order, no per-line queries
+            order = Order.objects.select_related('location').get(id=order_id)
+            items = OrderItem.objects.filter(order=order).select_related('menu_item')
         except Order.DoesNotExist:
             return Response(
                 {"error": "Order not found"}, 
@@ -23,8 +24,6 @@ class OrderReceiptView(APIView):
             f"Order Number: {order.order_number}",
             f"Date: {order.order_date.strftime('%Y-%m-%d %H:%M:%S')}",
             f"Location: {order.location.name}",
-            f"Customer: {order.customer_name or 'Walk-in'}",
-            f"Table: {order.table_number or 'N/A'}",
             "----------------------------------------"
         ]
 
@@ -32,7 +31,6 @@ class OrderReceiptView(APIView):
             receipt_content.extend([
                 f"{item.menu_item.name} x {item.quantity}",
                 f"Price per unit: {item.price}",
-                f"Notes: {item.notes or 'None'}",
                 "----------------------------------------"
             ])
 
@@ -1,11 +1,15 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from pos.apps.orders.models import Order, OrderItem
 from pos.apps.menu.models import MenuItemModel
 from pos.apps.locations.models import LocationModel
-import random
+from decimal import Decimal
+
+# Rows per INSERT when creating order items
+ORDER_ITEM_BATCH_SIZE = 500
 
 class OrderView(APIView):
     def post(self, request):
@@ -14,10 +18,8 @@ class OrderView(APIView):
         location_id = data.get('location_id')
         items = data.get('items', [])
 
-        # Validate location
-        try:
-            location = LocationModel.objects.get(id=location_id)
-        except LocationModel.DoesNotExist:
+        # Cheap payload checks first, a malformed request never reaches the database
+        if location_id is None:
             return Response(
                 {"error": "Invalid location ID"}, 
                 status=status.HTTP_400_BAD_REQUEST
@@ -30,17 +32,43 @@ class OrderView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        total_amount = 0
+        # Parse ids and quantities up front
+        try:
+            menu_item_ids = [int(item.get('menu_item_id')) for item in items]
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "Invalid menu item ID in order"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # int() would truncate 2.7 to 2 and under-charge, so only whole JSON numbers pass;
+        # bool is an int subclass, reject it explicitly
+        quantities = [item.get('quantity', 1) for item in items]
+        if not all(type(quantity) is int and quantity >= 1 for quantity in quantities):
+            return Response(
+                {"error": "Item quantities must be positive integers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Validate location
+        try:
+            location = LocationModel.objects.get(id=location_id)
+        except (LocationModel.DoesNotExist, ValueError):
+            return Response(
+                {"error": "Invalid location ID"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Fetch every ordered menu item in one query instead of one per line
+        menu_items = MenuItemModel.objects.only('id', 'price').in_bulk(menu_item_ids)
+
+        # Summed in integer cents, prices have two decimal places so this is exact
+        total_cents = 0
         order_items = []
 
         # Process each item
-        for item in items:
-            menu_item_id = item.get('menu_item_id')
-            quantity = item.get('quantity', 1)
-
-            try:
-                menu_item = MenuItemModel.objects.get(id=menu_item_id)
-            except MenuItemModel.DoesNotExist:
+        for menu_item_id, quantity in zip(menu_item_ids, quantities):
+            menu_item = menu_items.get(menu_item_id)
+            if menu_item is None:
                 return Response(
                     {"error": f"Invalid menu item ID: {menu_item_id}"},
                     status=status.HTTP_400_BAD_REQUEST
@@ -48,7 +76,7 @@ class OrderView(APIView):
 
             # Calculate item total
             item_price = menu_item.price
-            total_amount += item_price * quantity
+            total_cents += int(item_price * 100) * quantity
 
             # Store item details
             order_items.append({
@@ -57,23 +85,40 @@ class OrderView(APIView):
                 'price': item_price
             })
 
-        # Create order
+        total_amount = Decimal(total_cents).scaleb(-2)
+
+        # Create order and its items together, one commit and one multi-row INSERT for the items
+        order_number_taken = False
         try:
-            order = Order.objects.create(
-                location=location,
-                total_amount=total_amount,
-                processed_by=request.user if request.user.is_authenticated else None
-            )
-            
-            # Create order items
-            for item in order_items:
-                OrderItem.objects.create(
-                    order=order,
-                    menu_item=item['menu_item'],
-                    quantity=item['quantity'],
-                    price=item['price']
-                )
+            with transaction.atomic():
+                try:
+                    order = Order.objects.create(
+                        location=location,
+                        total_amount=total_amount,
+                        processed_by=request.user if request.user.is_authenticated else None
+                    )
+                except IntegrityError:
+                    # Foreign keys are only checked at commit, so the unique order_number
+                    # is the one constraint this insert can violate
+                    order_number_taken = True
+                    raise
+                
+                created_items = OrderItem.objects.bulk_create([
+                    OrderItem(
+                        order=order,
+                        menu_item=item['menu_item'],
+                        quantity=item['quantity'],
+                        price=item['price']
+                    )
+                    for item in order_items
+                ], batch_size=ORDER_ITEM_BATCH_SIZE)
         except Exception as e:
+            if order_number_taken:
+                # Two generated order numbers collided, the client can simply retry
+                return Response(
+                    {"error": "Could not assign an order number, please retry"},
+                    status=status.HTTP_409_CONFLICT
+                )
             return Response(
                 {"error": str(e)}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -81,8 +126,16 @@ class OrderView(APIView):
 
         return Response({
             'order_id': order.id,
+            'order_number': order.order_number,
             'total_amount': str(order.total_amount),
-            'order_items': order.items.values(),
+            # Built from the rows just inserted, same keys as order.items.values() without re-reading them
+            'order_items': [{
+                'id': order_item.id,
+                'order_id': order.id,
+                'menu_item_id': order_item.menu_item_id,
+                'quantity': order_item.quantity,
+                'price': order_item.price
+            } for order_item in created_items],
             'order_date': order.order_date,
             'message': 'Order created successfully',
         }, status=status.HTTP_201_CREATED)
\ No newline at end of file
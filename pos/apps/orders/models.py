@@ -2,15 +2,32 @@ from django.db import models
 from pos.apps.locations.models import LocationModel
 from pos.apps.menu.models import MenuItemModel
 from pos.apps.accounts.models import User
+from pos.apps.orders.utils import generate_order_number
 
 # Create your models here.
 class Order(models.Model):
     id = models.AutoField(primary_key=True)
+    # Null only for orders created before order numbers existed
+    order_number = models.CharField(max_length=48, unique=True, null=True, blank=True, editable=False)
     location = models.ForeignKey(LocationModel, on_delete=models.CASCADE)
     order_date = models.DateTimeField(auto_now_add=True)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
     processed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='processed_orders')
 
+    class Meta:
+        indexes = [
+            # Order history is filtered by date range and listed newest first
+            models.Index(fields=['-order_date'], name='order_date_idx'),
+            # Location-scoped history: filter by location, then walk by date
+            models.Index(fields=['location', '-order_date'], name='order_loc_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """Assign the order number on first save"""
+        if not self.order_number:
+            self.order_number = generate_order_number(self.location_id)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Order #{self.order_number}"
 
@@ -1,3 +1,34 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from pos.apps.accounts.models import User
+from pos.apps.locations.models import LocationModel
+from pos.apps.orders.models import Order
+
+
+class OrderHistoryETagTests(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        self.user = User.objects.create_superuser('admin@example.com', 'password')
+        self.location = LocationModel.objects.create(
+            name='Main', address='1 Main Street', city='City', state='State'
+        )
+        Order.objects.create(location=self.location, total_amount='5.00')
+        self.client.force_authenticate(self.user)
+
+    def test_unchanged_list_is_not_modified(self):
+        etag = self.client.get('/orders/history/')['ETag']
+        response = self.client.get('/orders/history/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_location_rename_changes_etag(self):
+        etag = self.client.get('/orders/history/')['ETag']
+
+        self.location.name = 'Renamed'
+        self.location.save()
+
+        response = self.client.get('/orders/history/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()[0]['location_name'], 'Renamed')
@@ -1,10 +1,11 @@
 from django.urls import path
-from .views import OrderView, OrderReceiptView, OrderHistoryView
+from .views import OrderView, OrderReceiptView, OrderHistoryView, OrderHistoryBatchView
 
 urlpatterns = [
    
     path('create-order/', OrderView.as_view()),
     path('generate-order-receipt/<int:order_id>/', OrderReceiptView.as_view()),
     path('history/', OrderHistoryView.as_view()),
+    path('history/batch/', OrderHistoryBatchView.as_view()),
 
 ]
\ No newline at end of file
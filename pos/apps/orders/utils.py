@@ -0,0 +1,23 @@
+import os
+import time
+
+# Crockford base32, the ULID alphabet (no I, L, O or U)
+_ULID_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+
+
+def _ulid():
+    """
+    26-character ULID: a 48-bit millisecond timestamp followed by 80 random bits.
+    Values sort by creation time, so new order numbers land at the end of their index.
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), 'big')
+    chars = []
+    for _ in range(26):
+        value, remainder = divmod(value, 32)
+        chars.append(_ULID_ALPHABET[remainder])
+    return ''.join(reversed(chars))
+
+
+def generate_order_number(location_id):
+    """Order number shown on receipts, unique without any lookup or lock"""
+    return f"ORD-{location_id}-{_ulid()}"
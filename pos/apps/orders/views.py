@@ -4,4 +4,4 @@ from django.shortcuts import render
 
 from ._views.OrderReceiptView import OrderReceiptView
 from ._views.OrderView import OrderView
-from ._views.OrderHistoryView import OrderHistoryView
\ No newline at end of file
+from ._views.OrderHistoryView import OrderHistoryView, OrderHistoryBatchView
\ No newline at end of file
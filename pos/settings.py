@@ -65,6 +65,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    # Compresses JSON responses for clients that accept gzip, kept above anything that edits the body
+    'django.middleware.gzip.GZipMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -147,9 +149,38 @@ DATABASES = {
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD'),
         'HOST': os.environ.get('DATABASE_HOST', 'localhost'),
         'PORT': os.environ.get('DATABASE_PORT', '5432'),
+        # Persistent connections only help under WSGI or behind PgBouncer; under
+        # ASGI (daphne) every request runs in a new thread and would leak them
+        'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', '0')),
+        'CONN_HEALTH_CHECKS': True,
+        # Required when DATABASE_HOST points at PgBouncer in transaction pooling mode
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DATABASE_POOLER') == 'pgbouncer',
     }
 }
 
+# ATOMIC_REQUESTS must stay False (the default) when running behind PgBouncer
+# in transaction pooling mode.
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Uses Redis when REDIS_URL is set, otherwise a per-process in-memory cache
+
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -0,0 +1,21 @@
+import hashlib
+
+from django.core.cache import cache
+
+
+def versioned_cache_key(prefix, scope, location_ids=()):
+    """
+    Cache key for a list response under `prefix`, scoped by `scope` and a location set.
+    Every key embeds the prefix's current version, so bump_version() drops them all at once.
+    """
+    version = cache.get_or_set(f"{prefix}:version", 1, None)
+    locations_hash = hashlib.md5(str(sorted(location_ids)).encode()).hexdigest()
+    return f"{prefix}:{version}:{scope}:{locations_hash}"
+
+
+def bump_version(prefix):
+    """Move `prefix` to a new version so every key built for it goes stale"""
+    try:
+        cache.incr(f"{prefix}:version")
+    except ValueError:
+        cache.set(f"{prefix}:version", 1, None)
@@ -0,0 +1,15 @@
+from django.utils.http import parse_etags
+
+
+def etag_matches(request, etag):
+    """
+    True if the request's If-None-Match lists `etag`. The comparison is weak because
+    GZipMiddleware turns the ETags we send into W/"..." and clients echo them back that way.
+    """
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    if '*' in etags:
+        return True
+    return etag.removeprefix('W/') in {tag.removeprefix('W/') for tag in etags}
@@ -5,7 +5,7 @@ Provides colored logging with different log levels and formatting
 
 import logging
 import os
-from typing import Optional
+from typing import Any, Optional
 
 import coloredlogs
 
@@ -77,40 +77,43 @@ class POSLogger:
             # Prevent duplicate logs
             self.logger.propagate = False
     
-    def debug(self, message: str) -> None:
-        """Log debug message"""
-        self.logger.debug(message)
+    def debug(self, message: str, *args: Any) -> None:
+        """Log debug message, formatted with %-style args only if emitted"""
+        self.logger.debug(message, *args)
     
-    def info(self, message: str) -> None:
-        """Log info message"""
-        self.logger.info(message)
+    def info(self, message: str, *args: Any) -> None:
+        """Log info message, formatted with %-style args only if emitted"""
+        self.logger.info(message, *args)
     
-    def warning(self, message: str) -> None:
-        """Log warning message"""
-        self.logger.warning(message)
+    def warning(self, message: str, *args: Any) -> None:
+        """Log warning message, formatted with %-style args only if emitted"""
+        self.logger.warning(message, *args)
     
-    def error(self, message: str, exc_info: bool = False) -> None:
+    def error(self, message: str, *args: Any, exc_info: bool = False) -> None:
         """
         Log error message
         
         Args:
-            message (str): Error message
+            message (str): Error message, may contain %-style placeholders
+            args: Values for the placeholders in message
             exc_info (bool): Include exception traceback if True
         """
-        self.logger.error(message, exc_info=exc_info)
+        self.logger.error(message, *args, exc_info=exc_info)
     
-    def critical(self, message: str, exc_info: bool = False) -> None:
+    def critical(self, message: str, *args: Any, exc_info: bool = False) -> None:
         """
         Log critical message
         
         Args:
-            message (str): Critical error message
+            message (str): Critical error message, may contain %-style placeholders
+            args: Values for the placeholders in message
             exc_info (bool): Include exception traceback if True
         """
-        self.logger.critical(message, exc_info=exc_info)
+        self.logger.critical(message, *args, exc_info=exc_info)
 
 
 # Example usage:
 # logger = POSLogger(__name__)
 # logger.info("Server started successfully")
+# logger.info("Order %s created by %s", order.id, user.email)
 # logger.error("Database connection failed", exc_info=True) 
\ No newline at end of file
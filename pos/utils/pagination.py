@@ -0,0 +1,16 @@
+def paginate(queryset, request, ordering=('id',)):
+    """
+    Apply optional ?limit= and ?offset= to a list queryset, ordered so pages are stable.
+    Without a limit the whole list is returned, as before. Raises ValueError on bad values.
+    """
+    limit = request.GET.get('limit')
+    offset = int(request.GET.get('offset', 0))
+    if offset < 0:
+        raise ValueError('offset must not be negative')
+    queryset = queryset.order_by(*ordering)
+    if limit is None:
+        return queryset[offset:] if offset else queryset
+    limit = int(limit)
+    if limit < 0:
+        raise ValueError('limit must not be negative')
+    return queryset[offset:offset + limit]
@@ -1,4 +1,5 @@
 from rest_framework.permissions import BasePermission
+from pos.apps.accounts.utils import get_user_location_ids
 from pos.utils.logger import POSLogger
 
 logger = POSLogger(__name__)
@@ -23,6 +24,27 @@ class IsFranchiseAdmin(BasePermission):
             return False
         return request.user.is_franchise_admin
 
+class IsSuperOrFranchiseAdmin(BasePermission):
+    """
+    Allows access only to super admins and franchise admins.
+    """
+    def has_permission(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            logger.warning("Unauthenticated user tried to access admin resource")
+            return False
+        return request.user.is_super_admin or request.user.is_franchise_admin
+
+class HasPOSRole(BasePermission):
+    """
+    Allows access to super admins, franchise admins and staff members.
+    """
+    def has_permission(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            logger.warning("Unauthenticated user tried to access POS resource")
+            return False
+        user = request.user
+        return user.is_super_admin or user.is_franchise_admin or user.is_staff_member
+
 class IsStaffMember(BasePermission):
     """
     Allows access only to staff members.
@@ -42,7 +64,7 @@ class IsAuthenticatedAndActive(BasePermission):
             logger.warning("Unauthenticated user tried to access protected resource")
             return False
         if not request.user.is_active:
-            logger.warning(f"Inactive user {request.user.email} tried to access protected resource")
+            logger.warning("Inactive user %s tried to access protected resource", request.user.email)
             return False
         return True
 
@@ -62,5 +84,21 @@ class HasLocationAccess(BasePermission):
             
         has_access = request.user.has_location_access(location_id)
         if not has_access:
-            logger.warning(f"User {request.user.email} tried to access location {location_id} without permission")
-        return has_access 
\ No newline at end of file
+            logger.warning("User %s tried to access location %s without permission", request.user.email, location_id)
+        return has_access 
+
+class CoversObjectLocations(BasePermission):
+    """
+    Object-level check: super admins pass, other users need access to every
+    location assigned to the target user.
+    """
+    message = 'You do not have access to all locations of this user'
+
+    def has_object_permission(self, request, view, obj):
+        if request.user.is_super_admin:
+            return True
+        # Any target location outside the requestor's set is enough to deny
+        if obj.locations.exclude(id__in=get_user_location_ids(request.user)).exists():
+            logger.warning("User %s tried to manage user %s outside their locations", request.user.email, obj.email)
+            return False
+        return True
@@ -0,0 +1,17 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# DRF's encoder knows how to turn Decimal, lazy strings, querysets etc. into JSON types
+_drf_encoder = JSONEncoder()
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON renderer backed by orjson, much faster than the stdlib encoder on large lists.
+    Types orjson doesn't handle natively fall back to DRF's JSONEncoder.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=_drf_encoder.default)